@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+import functools
+import inspect
+import json
+import time
+
+
+class Instrumentation(object):
+    """
+    Opt-in recording of the number of calls, the cumulative time and the number
+    of items processed by each stage of the pipeline (e.g. "create_clusters",
+    "evaluate_cluster", "build_prefix_tree_acceptor").
+    Nothing is recorded until enable is called (or inside session), the stages
+    then only check Instrumentation.enabled.
+    The stages can be nested, the time of a stage includes the time of the
+    stages it calls. Only the stages run by the current process are recorded,
+    the work sent to the worker processes (n_jobs) is not.
+    Only the entry points of the stages are instrumented: the decorator adds a
+    call even when disabled, therefore it is not used on the functions called
+    for each pair of sequences or each sequence.
+
+    Example
+    -------
+    with Instrumentation.session():
+        SequencesStringComparisonClustering.create_clusters(sequences)
+        summary = Instrumentation.get_summary()
+    """
+    # Holds True when the stages are recorded
+    enabled = False
+    # Holds the statistics of each stage {name: {"calls": int, "seconds": float, "items": int}}
+    _stages = dict()
+    # Holds the functions called each time a stage is recorded: callback(name, seconds, items)
+    _callbacks = list()
+
+    @staticmethod
+    def enable(reset: bool = True):
+        """ Start recording the stages, the statistics already recorded are removed when reset is True. """
+        if reset is True:
+            Instrumentation.reset()
+        # end if
+        Instrumentation.enabled = True
+    # end enable
+
+    @staticmethod
+    def disable():
+        """ Stop recording the stages, the statistics recorded are kept. """
+        Instrumentation.enabled = False
+    # end disable
+
+    @staticmethod
+    def reset():
+        """ Remove the statistics recorded. """
+        Instrumentation._stages = dict()
+    # end reset
+
+    @staticmethod
+    def add_callback(callback):
+        """ Add a function called with (name, seconds, items) each time a stage is recorded. """
+        if callable(callback) is False:
+            raise TypeError("callback should be callable.")
+        # end if
+        Instrumentation._callbacks.append(callback)
+    # end add_callback
+
+    @staticmethod
+    def remove_callback(callback):
+        """ Remove a function added with add_callback. """
+        if callback in Instrumentation._callbacks:
+            Instrumentation._callbacks.remove(callback)
+        # end if
+    # end remove_callback
+
+    @staticmethod
+    def record(name: str, seconds: float, items: int = 0, calls: int = 1):
+        """ Add a call of the stage, this is ignored when the instrumentation is disabled. """
+        if Instrumentation.enabled is False:
+            return
+        # end if
+        stage = Instrumentation._stages.get(name, None)
+        if stage is None:
+            stage = {"calls": 0, "seconds": 0.0, "items": 0}
+            Instrumentation._stages[name] = stage
+        # end if
+        stage["calls"] += calls
+        stage["seconds"] += seconds
+        stage["items"] += items
+        for callback in Instrumentation._callbacks:
+            callback(name, seconds, items)
+        # end for
+    # end record
+
+    @staticmethod
+    def stage(name: str, items: int = 0):
+        """
+        Return a context manager recording the time of its block as a call of the stage.
+        The number of items can also be set in the block (stage.items = ...).
+        """
+        if Instrumentation.enabled is False:
+            return _DISABLED_STAGE
+        # end if
+        return _Stage(name, items)
+    # end stage
+
+    @staticmethod
+    def instrument(name: str, items: str = None):
+        """
+        Return a decorator recording each call of the function as a call of the stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        items : str, optional
+            The name of the argument of the function whose length is the
+            number of items processed. The default is None (no item).
+        """
+        def decorator(function):
+            parameters = list(inspect.signature(function).parameters)
+            position = parameters.index(items) if items is not None else None
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if Instrumentation.enabled is False:
+                    return function(*args, **kwargs)
+                # end if
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    count = 0
+                    if position is not None:
+                        value = kwargs[items] if items in kwargs else args[position] if position < len(args) else None
+                        count = len(value) if hasattr(value, "__len__") else 0
+                    # end if
+                    Instrumentation.record(name, time.perf_counter() - start, items=count)
+                # end try
+            # end wrapper
+            return wrapper
+        # end decorator
+        return decorator
+    # end instrument
+
+    @staticmethod
+    def session(reset: bool = True):
+        """ Return a context manager enabling the instrumentation in its block. """
+        return _Session(reset)
+    # end session
+
+    @staticmethod
+    def get_summary() -> dict:
+        """
+        Return the statistics recorded.
+
+        Returns
+        -------
+        dict {name: {"calls": int, "seconds": float, "items": int,
+                     "mean_seconds": float (per call), "items_per_second": float or None}}
+            The stages are sorted by decreasing time.
+        """
+        summary = dict()
+        for name, stage in sorted(Instrumentation._stages.items(), key=lambda s: -s[1]["seconds"]):
+            summary[name] = dict(stage)
+            summary[name]["mean_seconds"] = stage["seconds"] / stage["calls"] if stage["calls"] else 0.0
+            summary[name]["items_per_second"] = stage["items"] / stage["seconds"] \
+                if stage["items"] and stage["seconds"] else None
+        # end for
+        return summary
+    # end get_summary
+
+    @staticmethod
+    def export(path: str):
+        """ Write the summary (see get_summary) to a JSON file. """
+        with open(path, "w") as file:
+            json.dump(Instrumentation.get_summary(), file, indent=2)
+        # end with
+    # end export
+
+    @staticmethod
+    def format_summary() -> str:
+        """ Return the summary as a table. """
+        lines = [f"{'stage':<50} {'calls':>10} {'seconds':>12} {'items':>12}"]
+        for name, stage in Instrumentation.get_summary().items():
+            lines.append(f"{name:<50} {stage['calls']:>10} {stage['seconds']:>12.6f} {stage['items']:>12}")
+        # end for
+        return "\n".join(lines)
+    # end format_summary
+
+    @staticmethod
+    def example_instrumentation():
+        @Instrumentation.instrument("example.square", items="values")
+        def square(values: list) -> list:
+            return [value * value for value in values]
+        # end square
+
+        square([1, 2, 3])  # Not recorded
+        recorded = list()
+        with Instrumentation.session():
+            Instrumentation.add_callback(lambda name, seconds, items: recorded.append(name))
+            square([1, 2, 3])
+            square(values=[4, 5])
+            with Instrumentation.stage("example.block") as stage:
+                stage.items = 10
+            # end with
+            summary = Instrumentation.get_summary()
+            Instrumentation._callbacks.pop()
+        # end with
+        assert Instrumentation.enabled is False
+        assert summary["example.square"]["calls"] == 2 and summary["example.square"]["items"] == 5
+        assert summary["example.block"]["items"] == 10
+        assert recorded == ["example.square", "example.square", "example.block"]
+        return summary
+    # end example_instrumentation
+
+# end Instrumentation
+
+
+class _Stage(object):
+    """ Context manager returned by Instrumentation.stage. """
+
+    def __init__(self, name: str, items: int = 0):
+        self.name = name
+        self.items = items
+        self._start = None
+    # end __init__
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    # end __enter__
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Instrumentation.record(self.name, time.perf_counter() - self._start, items=self.items)
+    # end __exit__
+
+# end _Stage
+
+
+class _DisabledStage(object):
+    """ Context manager returned by Instrumentation.stage when the instrumentation is disabled. """
+
+    def __enter__(self):
+        return self
+    # end __enter__
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+    # end __exit__
+
+    def __setattr__(self, name, value):
+        # The items set in the block are ignored
+        pass
+    # end __setattr__
+
+# end _DisabledStage
+
+
+class _Session(object):
+    """ Context manager returned by Instrumentation.session. """
+
+    def __init__(self, reset: bool = True):
+        self.reset = reset
+        self._was_enabled = False
+    # end __init__
+
+    def __enter__(self):
+        self._was_enabled = Instrumentation.enabled
+        Instrumentation.enable(reset=self.reset)
+        return Instrumentation
+    # end __enter__
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Instrumentation.enabled = self._was_enabled
+    # end __exit__
+
+# end _Session
+
+
+# Shared by the stages created while the instrumentation is disabled
+_DISABLED_STAGE = _DisabledStage()
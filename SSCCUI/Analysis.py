@@ -228,12 +228,14 @@ class Analysis(UI):
             self.graph = self.graph_original = str()
             return
         # end if
+        # The steps are converted once for both models
+        actions = PrefixSuffixFactorizedModel.convert_sequences(self.sequences)
         model = PrefixSuffixFactorizedModel(build_with_loop=True)
-        model.build_prefix_tree_acceptor(list_of_sequences=self.sequences)
+        model.build_prefix_tree_acceptor(list_of_sequences=actions, are_actions=True)
         self.graph = model.get_pta_content()
 
         model = PrefixSuffixFactorizedModel(build_with_loop=False)
-        model.build_prefix_tree_acceptor(list_of_sequences=self.sequences)
+        model.build_prefix_tree_acceptor(list_of_sequences=actions, are_actions=True)
         self.graph_original = model.get_pta_content()
     # end _create_graph_content
 
@@ -8,22 +8,88 @@ Created on Sun May 16 2021
 
 
 class Navigator(object):
+    """
+    State of an automaton. The states before and after the state are in the
+    previous and next lists. The lists of INDEX_MIN_SIZE states or more are indexed
+    by state number and by name (name and other_names) so that update_next,
+    update_previous, find_next and find_previous do not scan them. The indexes follow the changes made with
+    update_next, update_previous and remove_child and are rebuilt when the lists are
+    replaced or their size changes, therefore the name, other_names and number of
+    a state should be set before the state is linked.
+    The states are stored with __slots__ and their previous, next and other_names
+    containers are only created when first used, since the automata built by
+    PrefixSuffixFactorizedModel can hold millions of states, most of them with a
+    single previous state, no next state (final states) and no other name.
+    """
+    __slots__ = ("name", "description", "_previous", "_next", "is_start", "is_final_state", "is_self_loop",
+                 "loop_count", "number", "_other_names", "highlight", "_next_index", "_previous_index")
+    # Holds the size from which next and previous are indexed, the smaller lists are scanned
+    INDEX_MIN_SIZE = 8
 
     def __init__(self, name: str, is_start: bool = False, is_final_state: bool = False, description=str(),
                  number: int = 0):
         self.name = name
         self.description = description
-        self.previous = list()
-        self.next = list()
+        self._previous = None  # Created when first used (see previous)
+        self._next = None  # Created when first used (see next)
         self.is_start = is_start
         self.is_final_state = is_final_state
         self.is_self_loop = False
         self.loop_count = 0
         self.number = number
-        self.other_names = set()
+        self._other_names = None  # Created when first used (see other_names)
         self.highlight = False
+        # Hold the indexes of next and previous (see _get_index)
+        self._next_index = None
+        self._previous_index = None
     # end __init__
 
+    @property
+    def previous(self) -> list:
+        if self._previous is None:
+            self._previous = list()
+        # end if
+        return self._previous
+    # end previous
+
+    @previous.setter
+    def previous(self, value: list):
+        self._previous = value
+        self._previous_index = None
+    # end previous
+
+    @property
+    def next(self) -> list:
+        if self._next is None:
+            self._next = list()
+        # end if
+        return self._next
+    # end next
+
+    @next.setter
+    def next(self, value: list):
+        self._next = value
+        self._next_index = None
+    # end next
+
+    @property
+    def other_names(self) -> set:
+        if self._other_names is None:
+            self._other_names = set()
+        # end if
+        return self._other_names
+    # end other_names
+
+    @other_names.setter
+    def other_names(self, value: set):
+        self._other_names = value
+    # end other_names
+
+    def has_next(self) -> bool:
+        """ Return True if the state has next states, the next list is not created. """
+        return bool(self._next)
+    # end has_next
+
     def __str__(self):
         content = f"name: {self.name}, description: {self.description}"
         content += f", Is Start: {self.is_start}"
@@ -55,23 +121,13 @@ class Navigator(object):
         if (self.next and not other.next) or (other.next and not self.next):
             return False
         # end if
-        if other.number in [a.number for a in self.next] or self.number in [a.number for a in other.next]:
+        if self._has_number(other.number, is_next=True) or other._has_number(self.number, is_next=True):
             return False
         # end if
         # See if both states have at least one destination in common
-        destination, destination_other = False, False
-        for a in self.next:
-            if a.name in [b.name for b in other.next]:
-                destination = True
-                break
-            # end if
-        # end for
-        for a in other.next:
-            if a.name in [b.name for b in self.next]:
-                destination_other = True
-                break
-            # end if
-        # end for
+        names, names_other = {a.name for a in self.next}, {b.name for b in other.next}
+        destination = any(a.name in names_other for a in self.next)
+        destination_other = any(a.name in names for a in other.next)
         if destination is False and destination_other is False and (len(self.next) > 0 or len(other.next) > 0):
             return False
         # end if
@@ -84,7 +140,7 @@ class Navigator(object):
             self.loop_count = 2
         # end if
         sequences = set()
-        names = self.other_names.copy()
+        names = set(self._other_names) if self._other_names else set()
         names.add(self.name)
         for name in names:
             if not name:
@@ -116,50 +172,114 @@ class Navigator(object):
         return True
     # end is_navigator
 
-    def update_next(self, other, remove: bool):
-        self.is_navigator(other)
-        if isinstance(remove, bool) is False:
-            raise TypeError("remove should be of type bool.")
-        # end if
-        if remove is False and other.number not in [o.number for o in self.next]:
-            if self.number == other.number:
-                self.is_self_loop = True
-                self.loop_count += 1
-            else:
-                self.next.append(other)
+    @staticmethod
+    def _add_name(names: dict, navigator):
+        """ Add the navigator to the index of the names (name and other_names). """
+        names.setdefault(navigator.name, list()).append(navigator)
+        for name in navigator._other_names or ():
+            if name != navigator.name:
+                names.setdefault(name, list()).append(navigator)
             # end if
-        # end if
-        if remove is True:
-            for idx in range(len(self.next)):
-                if other.number == self.next[idx].number:
-                    self.next.pop(idx)
-                    break
-                # end if
+        # end for
+    # end _add_name
+
+    def _get_index(self, is_next: bool):
+        """
+        Return the index of next (is_next is True) or previous.
+
+        Returns
+        -------
+        tuple (the list indexed, dict {number: navigator}, dict {name: [navigators]}) or None
+            None when the list is smaller than INDEX_MIN_SIZE (the list is scanned instead).
+            The navigators of each name are in the order of the list.
+        """
+        navigators = self._next if is_next is True else self._previous
+        index = self._next_index if is_next is True else self._previous_index
+        if navigators is None or len(navigators) < Navigator.INDEX_MIN_SIZE:
+            index = None
+        elif index is None or index[0] is not navigators or len(index[1]) != len(navigators):
+            # The list grew, was replaced or was changed without update_next, update_previous
+            numbers, names = dict(), dict()
+            for nav in navigators:
+                numbers.setdefault(nav.number, nav)
+                self._add_name(names, nav)
             # end for
+            index = (navigators, numbers, names)
         # end if
-    # end update_next
+        if is_next is True:
+            self._next_index = index
+        else:
+            self._previous_index = index
+        # end if
+        return index
+    # end _get_index
 
-    def update_previous(self, other, remove: bool):
+    def _has_number(self, number: int, is_next: bool) -> bool:
+        """ Return True if a state of next (is_next is True) or previous has the number. """
+        index = self._get_index(is_next=is_next)
+        if index is None:
+            return number in [o.number for o in (self._next if is_next is True else self._previous) or ()]
+        # end if
+        return number in index[1]
+    # end _has_number
+
+    def _update_links(self, other, remove: bool, is_next: bool):
+        """ Add or remove other from next (is_next is True) or previous. """
         self.is_navigator(other)
         if isinstance(remove, bool) is False:
             raise TypeError("remove should be of type bool.")
         # end if
-        if remove is False and other.number not in [o.number for o in self.previous]:
+        # Holds the index when the list is indexed
+        index = self._get_index(is_next=is_next)
+        if index is None:
+            navigators = self._next if is_next is True else self._previous
+            is_linked = navigators is not None and other.number in [o.number for o in navigators]
+        else:
+            navigators = index[0]
+            is_linked = other.number in index[1]
+        # end if
+        if remove is False and is_linked is False:
             if self.number == other.number:
                 self.is_self_loop = True
                 self.loop_count += 1
             else:
-                self.previous.append(other)
+                # The list is created if needed
+                navigators = self.next if is_next is True else self.previous
+                navigators.append(other)
+                if index is not None:
+                    index[1][other.number] = other
+                    self._add_name(index[2], other)
+                # end if
             # end if
         # end if
-        if remove is True:
-            for idx in range(len(self.previous)):
-                if other.number == self.previous[idx].number:
-                    self.previous.pop(idx)
+        if remove is True and is_linked is True:
+            for idx in range(len(navigators)):
+                if other.number == navigators[idx].number:
+                    removed = navigators.pop(idx)
                     break
                 # end if
             # end for
+            if index is not None:
+                del index[1][other.number]
+                names = index[2]
+                for name in {removed.name} | (removed._other_names or set()):
+                    remaining = [nav for nav in names.get(name, list()) if nav is not removed]
+                    if remaining:
+                        names[name] = remaining
+                    else:
+                        names.pop(name, None)
+                    # end if
+                # end for
+            # end if
         # end if
+    # end _update_links
+
+    def update_next(self, other, remove: bool):
+        self._update_links(other, remove=remove, is_next=True)
+    # end update_next
+
+    def update_previous(self, other, remove: bool):
+        self._update_links(other, remove=remove, is_next=False)
     # end update_previous
 
     def get_content_as_graph(self) -> str:
@@ -194,20 +314,22 @@ class Navigator(object):
         content = ""
         s_name = get_state_name(self)
         current_name = self.name
-        if self.other_names:
-            current_name += f", {', '.join(self.other_names)}"
+        if self._other_names:
+            current_name += f", {', '.join(self._other_names)}"
         # end if
+        # The previous list is not created for the root
+        previous = self._previous or list()
         if self.is_self_loop is True:
             content += f'{s_name} -> {s_name} [label="{self.description if self.description else self.name}"];\n'
         # end if
         alt_name = f'"{self.number}_a"'
-        if len(self.previous) > 1:
+        if len(previous) > 1:
             content += f"{alt_name} [shape=point, width=0.01, height=0.01];\n"
             content += f'{alt_name} -> {s_name} [label="{current_name}"];\n'
             s_name = alt_name
         # end if
 
-        for nav in self.previous:
+        for nav in previous:
             # Get the state name of the current object
             name = get_state_name(nav)
             label = f' [label="{current_name}'
@@ -271,7 +393,7 @@ class Navigator(object):
         found = list()
         for nav in navigators:
             is_found = False
-            if name and (name == nav.name or name in nav.other_names):
+            if name and (name == nav.name or (nav._other_names and name in nav._other_names)):
                 is_found = True
             elif name:
                 continue
@@ -291,20 +413,32 @@ class Navigator(object):
         return found
     # end find_items
 
-    def find_previous(self, name: str, description: str, stop_at_one: bool = False):
-        if not self.previous:
+    def _find_indexed(self, name: str, description: str, is_next: bool, stop_at_one: bool = False) -> list:
+        """ Same as find_items on next (is_next is True) or previous, using the index of the names. """
+        navigators = self._next if is_next is True else self._previous
+        if not navigators:
             return list()
-        return self.find_items(
-            name=name, description=description, navigators=self.previous,
-            stop_at_one=stop_at_one)
+        # end if
+        if not name or isinstance(name, str) is False or description or isinstance(navigators, list) is False:
+            # Only the search by name is indexed
+            return self.find_items(
+                name=name, description=description, navigators=navigators, stop_at_one=stop_at_one)
+        # end if
+        index = self._get_index(is_next=is_next)
+        if index is None:
+            return self.find_items(
+                name=name, description=description, navigators=navigators, stop_at_one=stop_at_one)
+        # end if
+        found = index[2].get(name, list())
+        return found[:1] if stop_at_one is True else list(found)
+    # end _find_indexed
+
+    def find_previous(self, name: str, description: str, stop_at_one: bool = False):
+        return self._find_indexed(name=name, description=description, is_next=False, stop_at_one=stop_at_one)
     # end find_previous
 
     def find_next(self, name: str, description: str, stop_at_one: bool = False):
-        if not self.next:
-            return list()
-        return self.find_items(
-            name=name, description=description, navigators=self.next,
-            stop_at_one=stop_at_one)
+        return self._find_indexed(name=name, description=description, is_next=True, stop_at_one=stop_at_one)
     # end find_next
 
     def remove_child(self, name: str, description: str):
@@ -6,8 +6,11 @@ Created on Thu Feb 10 08:45:05 2022
 @author: Vahana Dorcis
 """
 import graphviz
+import sys
 import tempfile
 from Navigator import Navigator
+from Instrumentation import Instrumentation
+from SequencesEncoder import SequencesEncoder
 
 
 class PrefixSuffixFactorizedModel(object):
@@ -19,7 +22,9 @@ class PrefixSuffixFactorizedModel(object):
         self.states_orders = dict()
         self.build_with_loop = build_with_loop
         self._state_number = 0
-        self._sequences = set()
+        self._sequences = set()  # Holds the actions of the sequences inserted (tuple)
+        # Holds the position of the first final state without next state in final_states for each action
+        self._leaf_positions = dict()
     # end __init__
 
     def _clear(self):
@@ -29,10 +34,12 @@ class PrefixSuffixFactorizedModel(object):
         self.final_states = dict()
         self.states_orders = dict()
         self._state_number = 0
+        self._leaf_positions = dict()
     # end _clear
 
     # %%
-    def build_prefix_tree_acceptor(self, list_of_sequences: list):
+    @Instrumentation.instrument("build_prefix_tree_acceptor", items="list_of_sequences")
+    def build_prefix_tree_acceptor(self, list_of_sequences: list, are_actions: bool = False):
         """
         Build the Prefix Tree Acceptor using the sequences.
 
@@ -43,10 +50,20 @@ class PrefixSuffixFactorizedModel(object):
             Example 1: [['u', 0], ['s', 0], ['s', 0], ['s', 0], ['t', 0], ['a', 0]]
             Example 2: [['u'], ['s'], ['s'], ['s'], ['t'], ['a']]
 
+        are_actions : bool, optional
+            When True, the steps of the sequences are already converted to actions
+            (see convert_sequences) and are used as they are. The default is False.
+
         Returns
         -------
         None
 
+        Notes
+        -----
+        The PTA is built in a single process: the suffix factorization links the
+        states of a branch to the final states of the other branches and the state
+        numbers follow the order of the sequences.
+
         """
         # Validate inputs
         if not self.root or isinstance(self.root, Navigator) is False:
@@ -62,6 +79,8 @@ class PrefixSuffixFactorizedModel(object):
             self.states_orders = dict()
         # end if
 
+        # The final states may have been changed since the last call
+        self._leaf_positions = dict()
         # Create the root of the application to tie in all the paths. stuttering transition
         final_states_tracker = dict()  # Keep track of the states numbers used for the final states
         for _, states in self.final_states.items():
@@ -75,6 +94,8 @@ class PrefixSuffixFactorizedModel(object):
                 raise TypeError(f"Expected list, got {type(sequence)} instead.")
             # end if
             sequence_len = len(sequence)
+            # The steps are converted to actions once for the prefixes and the suffixes
+            actions = sequence if are_actions is True else [SequencesEncoder.get_action(step) for step in sequence]
             state_last_added = self.root  # Holds the last added state
             # Holds a final state that was previously added and matches the final state of the current sequences
             previous_final_state = None
@@ -84,7 +105,7 @@ class PrefixSuffixFactorizedModel(object):
             loop_tracker = dict()
             was_searched = False
             # Go through and add the items in the sequence
-            for index, prefix in enumerate(sequence):
+            for index in range(sequence_len):
                 is_start = index == 0
                 is_final_state = index == sequence_len - 1
 
@@ -95,8 +116,7 @@ class PrefixSuffixFactorizedModel(object):
                     break
                 # end if
 
-                # Convert the content of the sequence to string and concatenate it
-                value = "_".join([str(y) for y in prefix if y]) if isinstance(prefix, list) else str(prefix)
+                value = actions[index]
                 modified_sequence.append(value)
                 # Look for the sequence item in the children of the current state
                 state_search = state_last_added.find_next(name=value, stop_at_one=True, description=str())
@@ -121,7 +141,7 @@ class PrefixSuffixFactorizedModel(object):
 
                     if not previous_final_state and self.final_states and was_searched is False:
                         previous_final_state, merge_index, reverse_inputs = self._factorize_suffixes(
-                            sequence=sequence[index:], state_numbers=state_numbers)
+                            sequence=sequence[index:], state_numbers=state_numbers, actions=actions[index:])
                         was_searched = True
                         merge_index = (merge_index + index) if merge_index else None
                         if previous_final_state and is_final_state is True:
@@ -163,7 +183,7 @@ class PrefixSuffixFactorizedModel(object):
                 # end if
                 self.states_orders[state_last_added.number] = state_last_added
             # end for
-            self._sequences.add(",".join(modified_sequence))
+            self._sequences.add(tuple(modified_sequence))
             for sn, loop_count in loop_tracker.items():
                 if loop_count > self.states_orders[sn].loop_count:
                     self.states_orders[sn].loop_count = loop_count
@@ -172,7 +192,71 @@ class PrefixSuffixFactorizedModel(object):
         # end for sequence
     # end build_prefix_tree_acceptor
 
-    def _factorize_suffixes(self, sequence: list, state_numbers: set) -> tuple:
+    @staticmethod
+    @Instrumentation.instrument("convert_sequences", items="list_of_sequences")
+    def convert_sequences(list_of_sequences: list, cache: dict = None) -> list:
+        """
+        Convert the steps of the sequences to actions (see SequencesEncoder.get_action)
+        before building the PTA (see build_prefix_tree_acceptor with are_actions). The
+        actions are interned, therefore the equal actions are the same string object.
+
+        Parameters
+        ----------
+        list_of_sequences : list
+            A list holding the sequences as list.
+
+        cache : dict, optional
+            The actions already converted {action: interned action}, it is updated.
+            The default is None (a new cache is used).
+
+        Returns
+        -------
+        list
+            The list of the actions (str) of each sequence.
+        """
+        if cache is None:
+            cache = dict()
+        # end if
+        get_action = SequencesEncoder.get_action
+        converted = list()
+        for sequence in list_of_sequences:
+            if isinstance(sequence, list) is False:
+                raise TypeError(f"Expected list, got {type(sequence)} instead.")
+            # end if
+            actions = list()
+            for step in sequence:
+                action = get_action(step)
+                interned = cache.get(action, None)
+                if interned is None:
+                    interned = cache[action] = sys.intern(action)
+                # end if
+                actions.append(interned)
+            # end for
+            converted.append(actions)
+        # end for
+        return converted
+    # end convert_sequences
+
+    def _find_leaf_final_state(self, action: str):
+        """
+        Return the first final state of the action without next state or None.
+        The final states are only appended to final_states and get next states while
+        the PTA is built, therefore the final states before the position found for
+        the action are skipped by the next searches.
+        """
+        states = self.final_states.get(action, None)
+        if not states:
+            return None
+        # end if
+        position = self._leaf_positions.get(action, 0)
+        while position < len(states) and (states[position].name != action or states[position].has_next() is True):
+            position += 1
+        # end while
+        self._leaf_positions[action] = position
+        return states[position] if position < len(states) else None
+    # end _find_leaf_final_state
+
+    def _factorize_suffixes(self, sequence: list, state_numbers: set, actions: list = None) -> tuple:
         """
         Build a prefix tree acceptor starting from the final state if a matching final state is found in the
         init_final_states dictionary.
@@ -187,30 +271,28 @@ class PrefixSuffixFactorizedModel(object):
             A set of int containing the name of the states used. This is to prevent
             the use of the same state multiple times.
 
+        actions : list, optional
+            The actions of the items of sequence (see SequencesEncoder.get_action).
+            The default is None (the items are converted).
+
         Returns
         -------
         tuple
 
         """
-        def get_action(action):
-            return "_".join([str(y) for y in action if y]) if isinstance(action, list) else str(action)
-        # end get_action
-
         if isinstance(state_numbers, set) is False:
             raise Exception("state_numbers should be of type set.")
         # end if
+        if actions is None:
+            actions = [SequencesEncoder.get_action(step) for step in sequence]
+        # end if
 
+        # Holds the actions of the suffix found, from the last one
         inputs = list()
-        current_state = None
-        operation = get_action(sequence[-1])
-        if self.final_states.get(operation, False) is not False:
-            for fs in self.final_states[operation]:
-                if fs.name == operation and not fs.next:
-                    current_state = fs
-                    inputs.append(operation)
-                    break
-                # end if
-            # end for
+        operation = actions[-1]
+        current_state = self._find_leaf_final_state(operation)
+        if current_state is not None:
+            inputs.append(operation)
         # end if
 
         stopped_at_index = None
@@ -218,7 +300,7 @@ class PrefixSuffixFactorizedModel(object):
             sequence_len = len(sequence)
             stopped_at_index = sequence_len - 1
             for index in range(-2, -sequence_len, -1):
-                operation = get_action(sequence[index])
+                operation = actions[index]
                 # There should only be one final state with the same action name
                 found = current_state.find_previous(operation, str(), True)
                 # Do not reuse states that were already used.
@@ -239,14 +321,16 @@ class PrefixSuffixFactorizedModel(object):
                 else:
                     current_state = found[0]
                     stopped_at_index = sequence_len + index
-                    inputs.insert(0, operation)
+                    inputs.append(operation)
                 # end if
             # end for
         # end if
+        inputs.reverse()
         return current_state, stopped_at_index, inputs
     # end _factorize_suffixes
 
     # %%
+    @Instrumentation.instrument("get_pta_content")
     def get_pta_content(self, include_root: bool = True):
         graph = ""
         if include_root is True:
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+from array import array
+
+
+class SequencesEncoder(object):
+    """
+    Compact store of integer-encoded sequences.
+    Each distinct step of the sequences (e.g. ['scan', 0]) is converted to
+    an action name using the same format as PrefixSuffixFactorizedModel
+    ("_".join of the non-empty values) and the action name is mapped to a
+    small int. The encoded sequences are stored one after the other in a
+    single array('i') and the offsets of the sequences are kept in a second
+    array.
+
+    Indexing the store returns the encoded sequences as lists of int, which
+    can be used directly by SequencesStringComparisonClustering and
+    SequencesClustersEvaluation. The items compared are then int values.
+    The values returned by these classes (patterns, missing items, ...)
+    are encoded and can be converted back using decode.
+
+    Note: since the action names ignore the empty values, ['scan', 0] and
+    ['scan'] are encoded as the same step ("scan").
+    """
+
+    def __init__(self, sequences=None, share_symbols_with=None):
+        """
+        Parameters
+        ----------
+        sequences : iterable, optional
+            The sequences to add to the store.
+
+        share_symbols_with : SequencesEncoder, optional
+            When set, the symbols (the mapping from the action names to int)
+            are shared with that store. This is needed when the sequences of
+            several stores are compared, e.g. the clusters of a model.
+        """
+        if share_symbols_with is not None:
+            if isinstance(share_symbols_with, SequencesEncoder) is False:
+                raise TypeError("share_symbols_with should be of type SequencesEncoder.")
+            # end if
+            self.symbols = share_symbols_with.symbols
+            self._symbol_ids = share_symbols_with._symbol_ids
+        else:
+            self.symbols = list()  # Holds the action name of each int
+            self._symbol_ids = dict()  # Holds the int of each action name
+        # end if
+        self._buffer = array("i")  # Holds the encoded steps of all the sequences
+        self._offsets = array("q", [0])  # Holds the start of each sequence in the buffer
+        if sequences is not None:
+            self.add_many(sequences)
+        # end if
+    # end __init__
+
+    def __len__(self):
+        return len(self._offsets) - 1
+    # end __len__
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) is True:
+            return [self[i] for i in range(*index.indices(len(self)))]
+        # end if
+        if index < 0:
+            index += len(self)
+        # end if
+        if index < 0 or index >= len(self):
+            raise IndexError("SequencesEncoder index out of range.")
+        # end if
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]].tolist()
+    # end __getitem__
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+        # end for
+    # end __iter__
+
+    @staticmethod
+    def to_hashable(item):
+        """ Convert an item of a sequence (str, int, list, ...) to a hashable value. """
+        if isinstance(item, list):
+            return tuple([SequencesEncoder.to_hashable(i) for i in item])
+        # end if
+        return item
+    # end to_hashable
+
+    @staticmethod
+    def get_action(step) -> str:
+        """ Return the action name of a step of a sequence, e.g. ['s', 0] -> 's' and ['s', -2] -> 's_-2'. """
+        return "_".join([str(y) for y in step if y]) if isinstance(step, list) else str(step)
+    # end get_action
+
+    def encode_step(self, step) -> int:
+        """ Return the int of the step, the step is added to the symbols if needed. """
+        action = self.get_action(step)
+        symbol = self._symbol_ids.get(action, None)
+        if symbol is None:
+            symbol = len(self.symbols)
+            self._symbol_ids[action] = symbol
+            self.symbols.append(action)
+        # end if
+        return symbol
+    # end encode_step
+
+    def encode(self, sequence: list) -> list:
+        """ Return the encoded sequence without adding it to the store. """
+        if isinstance(sequence, list) is False:
+            raise TypeError("sequence should be of type list.")
+        # end if
+        return [self.encode_step(step) for step in sequence]
+    # end encode
+
+    def decode(self, sequence: list) -> list:
+        """ Return the action names of an encoded sequence. """
+        return [self.symbols[symbol] for symbol in sequence]
+    # end decode
+
+    def add(self, sequence: list) -> int:
+        """
+        Encode the sequence and add it to the store.
+
+        Returns
+        -------
+        int (The index of the sequence in the store.)
+        """
+        self._buffer.extend(self.encode(sequence))
+        self._offsets.append(len(self._buffer))
+        return len(self) - 1
+    # end add
+
+    def add_many(self, sequences):
+        """ Encode the sequences and add them to the store. """
+        for sequence in sequences:
+            self.add(sequence)
+        # end for
+    # end add_many
+
+    def view(self, index: int) -> memoryview:
+        """ Return the encoded sequence as a memoryview of the buffer (no copy). """
+        if index < 0 or index >= len(self):
+            raise IndexError("SequencesEncoder index out of range.")
+        # end if
+        return memoryview(self._buffer)[self._offsets[index]:self._offsets[index + 1]]
+    # end view
+
+    def get_buffers(self) -> tuple:
+        """
+        Return the internal arrays of the store.
+
+        Returns
+        -------
+        tuple (array('i'): the encoded steps of all the sequences,
+               array('q'): the offsets of the sequences, len(self) + 1 values)
+        """
+        return self._buffer, self._offsets
+    # end get_buffers
+
+    def to_list(self) -> list:
+        """ Return the encoded sequences as a list of lists of int. """
+        return [self[index] for index in range(len(self))]
+    # end to_list
+
+    @staticmethod
+    def encode_model(model: list) -> list:
+        """
+        Encode the clusters of a model. The clusters share the same symbols.
+
+        Returns
+        -------
+        list [SequencesEncoder]
+        """
+        if isinstance(model, list) is False:
+            raise TypeError("model should be of type list.")
+        # end if
+        encoded_model = list()
+        for cluster in model:
+            share = encoded_model[0] if encoded_model else None
+            encoded_model.append(SequencesEncoder(cluster, share_symbols_with=share))
+        # end for
+        return encoded_model
+    # end encode_model
+
+    @staticmethod
+    def example_encode():
+        store = SequencesEncoder([[["scan", 0], ["scan", 0], ["pay", 5]], [["pay", 5], ["scan", -2]]])
+        assert store.to_list() == [[0, 0, 1], [1, 2]], "Unexpected encoded sequences."
+        assert store.decode(store[1]) == ["pay_5", "scan_-2"], "Unexpected decoded sequence."
+        return store
+    # end example_encode
+
+# end SequencesEncoder
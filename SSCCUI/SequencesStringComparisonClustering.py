@@ -5,6 +5,12 @@ Created on Tue Oct  27 23:40:00 2020
 
 @author: Vahana Dorcis
 """
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from Instrumentation import Instrumentation
+from SequencesEncoder import SequencesEncoder
 
 
 class SequencesStringComparisonClustering(object):
@@ -61,6 +67,37 @@ class SequencesStringComparisonClustering(object):
         return True
     # end are_patterns_similar
 
+    @staticmethod
+    def create_pattern_key(pattern: list, consider_order_of_sequence: bool = True):
+        """
+        Create a hashable key from a pattern. Two patterns are similar
+        (see are_patterns_similar) if and only if their keys are equal.
+
+        Parameters
+        ----------
+        pattern : list
+            The pattern (subsequences) returned by create_pattern.
+
+        consider_order_of_sequence : bool, optional
+            When False, the key only holds the number of occurrences
+            of each item, which is the same as comparing the sorted
+            patterns. The default is True.
+
+        Returns
+        -------
+        tuple or frozenset (None if the pattern is empty since an empty
+        pattern is never similar to another pattern.)
+        """
+        if not pattern:
+            return None
+        # end if
+        key = tuple([SequencesEncoder.to_hashable(p) for p in pattern])
+        if consider_order_of_sequence is False:
+            return frozenset(Counter(key).items())
+        # end if
+        return key
+    # end create_pattern_key
+
     @staticmethod
     def _helper_validate_pattern_inputs(subsequence_size: int, consider_order_of_sequence: bool,
                                         consider_immediate_occurrence: bool, consider_duplicate_values: bool,
@@ -178,29 +215,37 @@ class SequencesStringComparisonClustering(object):
         if consider_order_of_sequence is False:
             sequence_copy = sorted(from_sequence)
         # end if
+        to_hashable = SequencesEncoder.to_hashable
+        # Holds the values already added to the patterns and the subsequences
+        seen_patterns, seen_subsequences = set(), set()
+        # Holds the number of back to back occurrences of the last value added
+        run_count = 0
         # Go through the content of the from_sequence
         for fs_item in sequence_copy:
+            is_repeated = bool(patterns) and fs_item == patterns[-1]
             if consider_immediate_occurrence is False:
                 # Back to back values are not considered, therefore
                 # move on if the current value is the same as the last one.
-                if patterns and fs_item == patterns[-1]:
+                if is_repeated is True:
                     continue
                 # end if
             # end if
-            if consider_duplicate_values is False and fs_item in patterns:
-                if consider_immediate_occurrence is True:
-                    if len(patterns) >= immediate_occurrence_max:
-                        compare_to = [fs_item] * immediate_occurrence_max
-                        if patterns[-immediate_occurrence_max:] == compare_to:
+            if consider_duplicate_values is False:
+                item_key = to_hashable(fs_item)
+                if item_key in seen_patterns:
+                    if consider_immediate_occurrence is True:
+                        if is_repeated is True and run_count >= immediate_occurrence_max:
                             continue
                         # end if
+                    else:
+                        continue
                     # end if
-                else:
-                    continue
                 # end if
+                seen_patterns.add(item_key)
             # end if
             # Add the item
             patterns.append(fs_item)
+            run_count = run_count + 1 if is_repeated is True else 1
 
             if subsequence_size <= 1:
                 subsequences.append(fs_item)
@@ -208,10 +253,13 @@ class SequencesStringComparisonClustering(object):
                 p_size = len(patterns)
                 if p_size == subsequence_size:
                     subsequences.append(patterns[:subsequence_size])
+                    seen_subsequences.add(to_hashable(subsequences[-1]))
                 elif p_size > subsequence_size:
                     subsequence = patterns[-subsequence_size + 1] + [fs_item]
                     # Only keep unique values
-                    if subsequence not in subsequences:
+                    subsequence_key = to_hashable(subsequence)
+                    if subsequence_key not in seen_subsequences:
+                        seen_subsequences.add(subsequence_key)
                         subsequences.append(subsequence)
                     # end if
                 # end if
@@ -222,14 +270,100 @@ class SequencesStringComparisonClustering(object):
 
     # %%
     @staticmethod
+    def _create_patterns_chunk(sequences: list, parameters: dict) -> list:
+        """
+        Create the patterns and the pattern keys of the sequences.
+        This is the unit of work sent to the processes by create_clusters.
+
+        Returns
+        -------
+        list [(patterns, subsequences, key)]
+        """
+        results = list()
+        for sequence in sequences:
+            patterns, subsequences = SequencesStringComparisonClustering.create_pattern(
+                from_sequence=sequence, **parameters)
+            key = SequencesStringComparisonClustering.create_pattern_key(
+                pattern=subsequences, consider_order_of_sequence=parameters["consider_order_of_sequence"])
+            results.append((patterns, subsequences, key))
+        # end for
+        return results
+    # end _create_patterns_chunk
+
+    @staticmethod
+    def _create_patterns_in_parallel(sequences: list, parameters: dict, n_jobs: int = -1, executor=None,
+                                     chunk_size: int = None):
+        """
+        Create the patterns of the sequences using a process pool.
+        The results are yielded in the order of the sequences.
+        """
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        # end if
+        if not chunk_size:
+            chunk_size = max(1, -(-len(sequences) // (n_jobs * 4)))
+        # end if
+        chunks = [sequences[i:i + chunk_size] for i in range(0, len(sequences), chunk_size)]
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                chunks_results = list(pool.map(
+                    SequencesStringComparisonClustering._create_patterns_chunk, chunks,
+                    [parameters] * len(chunks)))
+            # end with
+        else:
+            chunks_results = executor.map(
+                SequencesStringComparisonClustering._create_patterns_chunk, chunks,
+                [parameters] * len(chunks))
+        # end if
+        for chunk_results in chunks_results:
+            yield from chunk_results
+        # end for
+    # end _create_patterns_in_parallel
+
+    # %%
+    @staticmethod
+    @Instrumentation.instrument("create_clusters", items="sequences")
     def create_clusters(
             sequences: list, subsequence_size: int = 1, consider_order_of_sequence: bool = True,
             consider_immediate_occurrence: bool = True, consider_duplicate_values: bool = True,
-            immediate_occurrence_max: int = 2
+            immediate_occurrence_max: int = 2, n_jobs: int = 1, executor=None, chunk_size: int = None
     ) -> tuple:
+        """
+        Create the clusters of the sequences. The sequences with similar
+        patterns (see create_pattern) are in the same cluster.
+
+        Parameters
+        ----------
+        sequences : list
+            The sequences to cluster.
+
+        subsequence_size, consider_order_of_sequence, consider_immediate_occurrence,
+        consider_duplicate_values, immediate_occurrence_max :
+            See create_pattern.
+
+        n_jobs : int, optional
+            The number of processes used to create the patterns. Set to -1
+            to use all the CPUs. The default is 1 (no process is created).
+
+        executor : concurrent.futures.Executor, optional
+            The executor used to create the patterns instead of a new process
+            pool. The executor is not shut down. The default is None.
+
+        chunk_size : int, optional
+            The number of sequences sent to a process at a time. The default
+            is None (the sequences are split in 4 chunks per process).
+
+        Returns
+        -------
+        tuple (cluster_columns, cluster_values, cluster_size, dict_patterns)
+            The cluster numbers do not depend on n_jobs.
+        """
         if not subsequence_size:
             subsequence_size = 1
         # end if
+        if isinstance(n_jobs, int) is False or n_jobs == 0:
+            raise TypeError("n_jobs should be a non-zero int.")
+        # end if
         _ = SequencesStringComparisonClustering._helper_validate_pattern_inputs(
                 subsequence_size=subsequence_size, consider_order_of_sequence=consider_order_of_sequence,
                 consider_immediate_occurrence=consider_immediate_occurrence,
@@ -240,44 +374,52 @@ class SequencesStringComparisonClustering(object):
         # end if
         # Holds the extracted subsequences
         dict_patterns = dict()
+        # Holds the cluster number of each pattern key
+        dict_keys = dict()
         # Holds the clustering result
         column_sequence = "Sequences"
         column_sequence_pattern = "Sequences Pattern"
         column_cluster_number = "Cluster Number"
         cluster_columns = [column_sequence, column_sequence_pattern, column_cluster_number]
         cluster_values = list()
-        for sequence in sequences:
-            # Create a pattern
-            pattern_result = SequencesStringComparisonClustering.create_pattern(
-                from_sequence=sequence, subsequence_size=subsequence_size,
-                consider_order_of_sequence=consider_order_of_sequence,
-                consider_immediate_occurrence=consider_immediate_occurrence,
-                consider_duplicate_values=consider_duplicate_values, immediate_occurrence_max=immediate_occurrence_max
-            )
-            patterns, subsequences = pattern_result
-            # Holds the cluster number
-            cluster_number = 0
-            if not dict_patterns:
-                dict_patterns = {cluster_number: (subsequences, [sequence])}
-            else:
-                has_pattern = False
-                for number, values in dict_patterns.items():
-                    if SequencesStringComparisonClustering.are_patterns_similar(
-                        pattern1=subsequences, pattern2=values[0],
-                        consider_order_of_sequence=consider_order_of_sequence
-                    ) is True:
-                        has_pattern = True
-                        cluster_number = number
-                        # Update the dictionary
-                        new_values = (subsequences, values[1] + [sequence])
-                        dict_patterns[cluster_number] = new_values
-                        break
-                    # end if
-                # end for
-                if has_pattern is False:
-                    cluster_number = len(dict_patterns)
-                    dict_patterns[cluster_number] = (subsequences, [sequence])
+        parameters = {
+            "subsequence_size": subsequence_size, "consider_order_of_sequence": consider_order_of_sequence,
+            "consider_immediate_occurrence": consider_immediate_occurrence,
+            "consider_duplicate_values": consider_duplicate_values, "immediate_occurrence_max": immediate_occurrence_max
+        }
+        if executor is not None or n_jobs != 1:
+            sequences = sequences if isinstance(sequences, list) is True else list(sequences)
+            pattern_results = zip(sequences, SequencesStringComparisonClustering._create_patterns_in_parallel(
+                sequences=sequences, parameters=parameters, n_jobs=n_jobs, executor=executor,
+                chunk_size=chunk_size))
+        else:
+            pattern_results = (
+                (sequence, SequencesStringComparisonClustering._create_patterns_chunk([sequence], parameters)[0])
+                for sequence in sequences)
+        # end if
+        # Holds True when the time of the patterns and of the lookups is recorded
+        is_instrumented = Instrumentation.enabled
+        lookup_seconds, pattern_seconds, start = 0.0, 0.0, time.perf_counter()
+        for sequence, pattern_result in pattern_results:
+            if is_instrumented is True:
+                # The patterns are created while iterating over pattern_results
+                pattern_seconds += time.perf_counter() - start
+                start = time.perf_counter()
+            # end if
+            patterns, subsequences, key = pattern_result
+            # Look for the cluster of the pattern
+            cluster_number = dict_keys.get(key, None) if key is not None else None
+            if cluster_number is None:
+                cluster_number = len(dict_patterns)
+                dict_patterns[cluster_number] = (subsequences, [sequence])
+                if key is not None:
+                    dict_keys[key] = cluster_number
                 # end if
+            else:
+                # Update the dictionary
+                members = dict_patterns[cluster_number][1]
+                members.append(sequence)
+                dict_patterns[cluster_number] = (subsequences, members)
             # end if
             # Store the clustering result
             cluster_row = [None] * len(cluster_columns)
@@ -285,7 +427,15 @@ class SequencesStringComparisonClustering(object):
             cluster_row[cluster_columns.index(column_sequence_pattern)] = patterns
             cluster_row[cluster_columns.index(column_sequence)] = sequence
             cluster_values.append(cluster_row)
+            if is_instrumented is True:
+                lookup_seconds += time.perf_counter() - start
+                start = time.perf_counter()
+            # end if
         # end for sequences
+        if is_instrumented is True:
+            Instrumentation.record("create_clusters.create_pattern", pattern_seconds, items=len(cluster_values))
+            Instrumentation.record("create_clusters.cluster_lookup", lookup_seconds, items=len(cluster_values))
+        # end if
         cluster_size = len(dict_patterns)
         return cluster_columns, cluster_values, cluster_size, dict_patterns
     # end create_clusters
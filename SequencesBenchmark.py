@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from SequencesClustersEvaluation import SequencesClustersEvaluation
+from SequencesKernels import SequencesKernels
+from SequencesStringComparisonClustering import SequencesStringComparisonClustering
+
+
+class SequencesBenchmark(object):
+    """
+    Benchmark of the hot paths of the clustering and of the evaluation
+    (create_pattern, create_clusters, homogeneity_evaluation, disparity_evaluation,
+    evaluate_model and build_prefix_tree_acceptor) on synthetic sessions.
+    The report holds the time and the peak memory of each step for each scale
+    and can be written to a JSON file to compare the results of two commits
+    (see compare_reports).
+    """
+    # Holds the version of the format of the report
+    REPORT_VERSION = 1
+
+    @staticmethod
+    def generate_sessions(
+            sequences_count: int = 1000, alphabet_size: int = 20, sequence_length: int = 30,
+            repetition_rate: float = 0.3, clusters_count: int = 10, cluster_skew: float = 1.0,
+            mutation_rate: float = 0.1, seed: int = 0) -> tuple:
+        """
+        Generate sessions shaped like SequencesClustersEvaluation.example_sequences,
+        e.g. [['unlock', 0], ['scan', 0], ['scan', -2], ...].
+        Each session is a variation of one of clusters_count templates.
+
+        Parameters
+        ----------
+        sequences_count : int, optional
+            The number of sessions. The default is 1000.
+        alphabet_size : int, optional
+            The number of distinct actions. The default is 20.
+        sequence_length : int, optional
+            The average number of steps of the templates. The default is 30.
+        repetition_rate : float, optional
+            The probability that a step of a template repeats the previous one
+            (e.g. ['scan', 0], ['scan', 0]). The default is 0.3.
+        clusters_count : int, optional
+            The number of templates. The default is 10.
+        cluster_skew : float, optional
+            The template k is chosen with a weight of 1 / (k + 1) ** cluster_skew,
+            0 gives clusters of the same size. The default is 1.0.
+        mutation_rate : float, optional
+            The probability that a step of a session is replaced, removed or
+            duplicated. The default is 0.1.
+        seed : int, optional
+            The seed of the sessions. The default is 0.
+
+        Returns
+        -------
+        tuple (list of the sessions, list of the template number of each session)
+        """
+        generator = random.Random(seed)
+        actions = [[f"action{i}", 0] for i in range(alphabet_size)]
+        # Some actions have a value, e.g. ['scan', -2]
+        actions += [[f"action{i}", -2] for i in range(0, alphabet_size, 5)]
+        templates = list()
+        for _ in range(clusters_count):
+            length = max(1, int(generator.gauss(sequence_length, sequence_length / 4)))
+            template = [generator.choice(actions)]
+            while len(template) < length:
+                if generator.random() < repetition_rate:
+                    template.append(template[-1])
+                else:
+                    template.append(generator.choice(actions))
+                # end if
+            # end while
+            templates.append(template)
+        # end for
+        weights = [1 / (k + 1) ** cluster_skew for k in range(clusters_count)]
+        sessions, labels = list(), list()
+        for label in generator.choices(range(clusters_count), weights=weights, k=sequences_count):
+            session = list()
+            for step in templates[label]:
+                draw = generator.random()
+                if draw < mutation_rate / 3:
+                    session.append(generator.choice(actions))
+                elif draw < 2 * mutation_rate / 3:
+                    continue
+                elif draw < mutation_rate:
+                    session += [step, step]
+                else:
+                    session.append(step)
+                # end if
+            # end for
+            if not session:
+                session = [templates[label][0]]
+            # end if
+            # The steps are copied, the sessions do not share the lists
+            sessions.append([list(step) for step in session])
+            labels.append(label)
+        # end for
+        return sessions, labels
+    # end generate_sessions
+
+    @staticmethod
+    def measure(function, repeat: int = 3) -> dict:
+        """
+        Measure the time of the function (best and mean of repeat calls) and
+        the peak memory allocated during one more call (tracemalloc).
+
+        Returns
+        -------
+        dict {"seconds": float, "mean_seconds": float, "peak_memory": int (bytes)}
+        """
+        durations = list()
+        for _ in range(max(1, repeat)):
+            gc.collect()
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+        # end for
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # end try
+        return {"seconds": min(durations), "mean_seconds": sum(durations) / len(durations), "peak_memory": peak}
+    # end measure
+
+    @staticmethod
+    def _import_prefix_suffix_factorized_model():
+        """ Return the PrefixSuffixFactorizedModel class of SSCCUI or None if it cannot be imported. """
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SSCCUI")
+        if directory not in sys.path:
+            # Appended so that the modules of the root directory are used first
+            sys.path.append(directory)
+        # end if
+        try:
+            from PrefixSuffixFactorizedModel import PrefixSuffixFactorizedModel
+        except ImportError:  # graphviz is required by PrefixSuffixFactorizedModel
+            return None
+        # end try
+        return PrefixSuffixFactorizedModel
+    # end _import_prefix_suffix_factorized_model
+
+    @staticmethod
+    def get_metadata() -> dict:
+        """ Return the description of the environment of the benchmark. """
+        commit = None
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        # end try
+        versions = dict()
+        for name in ["numpy", "numba"]:
+            module = sys.modules.get(name, None)
+            versions[name] = getattr(module, "__version__", None) if module is not None else None
+        # end for
+        return {"report_version": SequencesBenchmark.REPORT_VERSION, "commit": commit,
+                "python": platform.python_version(), "platform": platform.platform(),
+                "kernels_compiled": SequencesKernels.is_compiled(), "versions": versions,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    # end get_metadata
+
+    @staticmethod
+    def run(scales: tuple = (100, 1000), repeat: int = 3, pairs_count: int = 1000, output: str = None,
+            steps: tuple = None, seed: int = 0, **generator_parameters) -> dict:
+        """
+        Run the benchmark.
+
+        Parameters
+        ----------
+        scales : tuple, optional
+            The numbers of sessions generated. The default is (100, 1000).
+        repeat : int, optional
+            The number of calls timed for each step. The default is 3.
+        pairs_count : int, optional
+            The number of pairs of sessions used for homogeneity_evaluation and
+            disparity_evaluation. The default is 1000.
+        output : str, optional
+            The path of the JSON file of the report. The default is None (not written).
+        steps : tuple, optional
+            The names of the steps to run. The default is None (all the steps).
+        seed : int, optional
+            The seed of the sessions and of the pairs. The default is 0.
+        generator_parameters :
+            The parameters of generate_sessions.
+
+        Returns
+        -------
+        dict {"metadata": dict, "parameters": dict,
+              "results": [{"step": str, "scale": int, "items": int, "seconds": float,
+                           "mean_seconds": float, "peak_memory": int} or
+                          {"step": str, "scale": int, "skipped": str}]}
+        """
+        pta_model = SequencesBenchmark._import_prefix_suffix_factorized_model()
+        results = list()
+        for scale in scales:
+            sessions, labels = SequencesBenchmark.generate_sessions(
+                sequences_count=scale, seed=seed, **generator_parameters)
+            generator = random.Random(seed)
+            pairs = [(generator.choice(sessions), generator.choice(sessions)) for _ in range(pairs_count)]
+            model = dict()
+            for session, label in zip(sessions, labels):
+                model.setdefault(label, list()).append(session)
+            # end for
+            model = list(model.values())
+
+            def build_pta():
+                pta_model().build_prefix_tree_acceptor(sessions)
+            # end build_pta
+
+            benchmarks = [
+                ("create_pattern", len(sessions), lambda: [
+                    SequencesStringComparisonClustering.create_pattern(session, 1) for session in sessions]),
+                ("create_clusters", len(sessions), lambda: SequencesStringComparisonClustering.create_clusters(
+                    sessions)),
+                ("homogeneity_evaluation", len(pairs), lambda: [
+                    SequencesClustersEvaluation.homogeneity_evaluation(s1, s2) for s1, s2 in pairs]),
+                ("disparity_evaluation", len(pairs), lambda: [
+                    SequencesClustersEvaluation.disparity_evaluation(s1, s2) for s1, s2 in pairs]),
+                ("evaluate_model", sum(len(c) * (len(c) - 1) // 2 for c in model), lambda: (
+                    SequencesClustersEvaluation.evaluate_model(model, eval_disparity_if_homogeneity_is_zero=False))),
+                ("build_prefix_tree_acceptor", len(sessions), build_pta)
+            ]
+            for name, items, function in benchmarks:
+                if steps is not None and name not in steps:
+                    continue
+                # end if
+                if name == "build_prefix_tree_acceptor" and pta_model is None:
+                    results.append({"step": name, "scale": scale, "skipped": "graphviz is not installed"})
+                    continue
+                # end if
+                result = {"step": name, "scale": scale, "items": items}
+                result.update(SequencesBenchmark.measure(function, repeat=repeat))
+                results.append(result)
+            # end for
+        # end for
+        parameters = {"scales": list(scales), "repeat": repeat, "pairs_count": pairs_count, "seed": seed}
+        parameters.update(generator_parameters)
+        report = {"metadata": SequencesBenchmark.get_metadata(), "parameters": parameters, "results": results}
+        if output is not None:
+            with open(output, "w") as file:
+                json.dump(report, file, indent=2)
+            # end with
+        # end if
+        return report
+    # end run
+
+    @staticmethod
+    def compare_reports(baseline, current) -> list:
+        """
+        Compare two reports (dict or path of a JSON file) created with the same parameters.
+
+        Returns
+        -------
+        list [{"step": str, "scale": int, "time_ratio": current / baseline seconds,
+               "memory_ratio": current / baseline peak memory}]
+        """
+        reports = list()
+        for report in [baseline, current]:
+            if isinstance(report, str) is True:
+                with open(report) as file:
+                    report = json.load(file)
+                # end with
+            # end if
+            reports.append({(r["step"], r["scale"]): r for r in report["results"] if "skipped" not in r})
+        # end for
+        comparison = list()
+        for key, result in reports[1].items():
+            previous = reports[0].get(key, None)
+            if previous is None:
+                continue
+            # end if
+            comparison.append({
+                "step": key[0], "scale": key[1],
+                "time_ratio": result["seconds"] / previous["seconds"] if previous["seconds"] else None,
+                "memory_ratio": result["peak_memory"] / previous["peak_memory"] if previous["peak_memory"] else None})
+        # end for
+        return comparison
+    # end compare_reports
+
+    @staticmethod
+    def example_run():
+        report = SequencesBenchmark.run(scales=(50,), repeat=1, pairs_count=50)
+        comparison = SequencesBenchmark.compare_reports(report, report)
+        assert all(c["time_ratio"] == 1 for c in comparison), "A report should match itself."
+        return report
+    # end example_run
+
+# end SequencesBenchmark
+
+
+if __name__ == "__main__":
+    # Usage: python SequencesBenchmark.py [output.json]
+    SequencesBenchmark.run(output=sys.argv[1] if len(sys.argv) > 1 else "benchmark.json")
+# end if
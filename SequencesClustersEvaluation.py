@@ -5,14 +5,95 @@ Created on Mon Nov  2 10:08:04 2020
 
 @author: Vahana Dorcis
 """
-import pdb
+import math
+import os
+import random
+import statistics
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from Instrumentation import Instrumentation
+from SequencesEncoder import SequencesEncoder
+from SequencesKernels import SequencesKernels
+from SequencesMemoization import SequencesMemoization
+from SequencesScoreCache import SequencesScoreCache
+try:
+    import numpy
+except ImportError:  # numpy is only used to compute the homogeneity with bitsets
+    numpy = None
 
 
 class SequencesClustersEvaluation(object):
+    # Holds the minimum number of rows evaluated to compute a confidence interval (see evaluate_cluster_sampled)
+    MIN_SAMPLED_ROWS = 30
+
+    @staticmethod
+    def _z_array(sequence: list) -> list:
+        """
+        Compute the Z-array of the sequence: z[i] is the length of the longest
+        common prefix of sequence and sequence[i:]. z[0] is len(sequence).
+        """
+        size = len(sequence)
+        z = [0] * size
+        if size:
+            z[0] = size
+        # end if
+        left, right = 0, 0
+        for i in range(1, size):
+            k = min(z[i - left], right - i) if i < right else 0
+            while i + k < size and sequence[k] == sequence[i + k]:
+                k += 1
+            # end while
+            z[i] = k
+            if i + k > right:
+                left, right = i, i + k
+            # end if
+        # end for
+        return z
+    # end _z_array
+
+    @staticmethod
+    def longest_common_prefixes(pattern: list, sequence: list) -> list:
+        """
+        Compute, for each index i of sequence, the length of the longest
+        common prefix of pattern and sequence[i:] in O(len(pattern) + len(sequence))
+        using the Z-array of the pattern. No slice is created.
+
+        Returns
+        -------
+        list of int (Same size as sequence.)
+        """
+        z = SequencesClustersEvaluation._z_array(pattern)
+        pattern_size, sequence_size = len(pattern), len(sequence)
+        prefixes = [0] * sequence_size
+        # sequence[left:right] is equal to pattern[:right - left]
+        left, right = 0, 0
+        for i in range(sequence_size):
+            k = min(z[i - left], right - i) if i < right else 0
+            if i + k >= right:
+                while k < pattern_size and i + k < sequence_size and pattern[k] == sequence[i + k]:
+                    k += 1
+                # end while
+                if i + k > right:
+                    left, right = i, i + k
+                # end if
+            # end if
+            prefixes[i] = k
+        # end for
+        return prefixes
+    # end longest_common_prefixes
 
     @staticmethod
     def find_largest_subsequence_index(subsequence: list, sequence: list) -> tuple:
+        """
+        Find the first index in sequence where the longest prefix of subsequence starts.
+
+        Returns
+        -------
+        None if the first item of subsequence is not in sequence or if
+        the size of the subsequence is <= 1,
+        [(0, size)], 0, size if subsequence and sequence are equal,
+        otherwise tuple (index, number of items found).
+        """
         # Validate inputs
         if (isinstance(subsequence, list) is False or isinstance(sequence, list) is False
                 or not subsequence or not sequence):
@@ -28,43 +109,9 @@ class SequencesClustersEvaluation(object):
         if subsequence == sequence:
             return [(0, subsequence_size)], 0, subsequence_size
         # end if
-        # Holds the search index
-        search_index = 0
-        best_index = None  # The index where the most items was found
-        best_number_items = None  # The number of items found
-        # Holds the length of the sequence
-        sequence_size = len(sequence)
-        while subsequence[0] in sequence[search_index:]:
-            # Get the index of the first item
-            index = sequence[search_index:].index(subsequence[0])
-            # Update the index
-            index += search_index
-            # Update the size of the sequence
-            seq_size = sequence_size - index
-            # Holds the number of items found
-            items_found = 1
-            if subsequence == sequence[index:]:
-                items_found = subsequence_size
-            else:
-                for i in range(1, subsequence_size):
-                    if i >= seq_size or subsequence[i] != sequence[i + index]:
-                        break
-                    # end if
-                    items_found += 1
-                # end for
-            # end if
-            if best_index is None or best_number_items < items_found:
-                best_index = index
-                best_number_items = items_found
-            # end if
-            # When the number of items found is greater than the remaining items,
-            # stop the search
-            if best_number_items >= seq_size:
-                break
-            # end if
-            # Increment the search index by 1
-            search_index = index + 1
-        # end while
+        prefixes = SequencesClustersEvaluation.longest_common_prefixes(subsequence, sequence)
+        best_number_items = max(prefixes)
+        best_index = prefixes.index(best_number_items)
         return best_index, best_number_items
     # end find_largest_subsequence_index
 
@@ -203,114 +250,334 @@ class SequencesClustersEvaluation(object):
         return missing_score, missing_items
     # end calculate_dissimilarity_shift_indexes
 
+    @staticmethod
+    def create_homogeneity_signature(sequence: list) -> dict:
+        """
+        Create the signature of a sequence used to compute the homogeneity score.
+        The signature holds the distinct items of the sequence in the order of
+        their first occurrence.
+
+        Returns
+        -------
+        dict {hashable item: item}
+        """
+        if isinstance(sequence, list) is False:
+            raise TypeError("The inputs should be of type list.")
+        # end if
+        signature = dict()
+        for item in sequence:
+            key = SequencesEncoder.to_hashable(item)
+            if key not in signature:
+                signature[key] = item
+            # end if
+        # end for
+        return signature
+    # end create_homogeneity_signature
+
+    @staticmethod
+    def homogeneity_evaluation_from_signatures(signature1: dict, signature2: dict) -> tuple:
+        """
+        Compute the homogeneity score using the signatures of the sequences
+        (see create_homogeneity_signature). The score is the size of the
+        symmetric difference of the distinct items of the sequences.
+
+        Returns
+        -------
+        tuple
+            (The number of missing items: int, the missing items: list)
+            The missing items of sequence1 come first, in the order of their
+            first occurrence, followed by the missing items of sequence2.
+        """
+        missing = [item for key, item in signature1.items() if key not in signature2]
+        missing += [item for key, item in signature2.items() if key not in signature1]
+        return len(missing), missing
+    # end homogeneity_evaluation_from_signatures
+
     @staticmethod
     def homogeneity_evaluation(sequence1: list, sequence2: list) -> tuple:
         if isinstance(sequence1, list) is False or isinstance(sequence2, list) is False:
             raise TypeError("The inputs should be of type list.")
         # end if
-        # Make a copy to avoid modifying the original sequences
-        copy1 = sequence1.copy()
-        copy2 = sequence2.copy()
-        if copy1 == copy2:
+        if sequence1 == sequence2:
             return 0, list()
         # end if
-        # Holds the missing items
-        missing = list()
-        while copy1 and copy2:
-            if copy1 == copy2:
-                copy1, copy2 = list(), list()
-                break
-            # end if
-            current = copy1[0]
-            is_missing = True
-            while current in copy2:
-                is_missing = False
-                copy2.remove(current)
-            # end while
-            while current in copy1:
-                copy1.remove(current)
-            # end while
-            if is_missing is True and current not in missing:
-                missing.append(current)
+        return SequencesClustersEvaluation.homogeneity_evaluation_from_signatures(
+            SequencesClustersEvaluation.create_homogeneity_signature(sequence1),
+            SequencesClustersEvaluation.create_homogeneity_signature(sequence2))
+    # end homogeneity_evaluation
+
+    @staticmethod
+    def create_sequence_profile(sequence: list) -> dict:
+        """
+        Create the profile of a sequence used to compute its scores against many
+        sequences (see evaluate_one_to_many). The items of the sequence are only
+        converted once to hashable values, the signature (see
+        create_homogeneity_signature) and the positions of each item are
+        created when first needed (see _get_signature, _get_positions).
+
+        Returns
+        -------
+        dict {"sequence": list, "keys": tuple of the hashable items,
+              "signature": dict or None, "positions": dict or None,
+              "array": the sequence for SequencesKernels or None}
+        """
+        if isinstance(sequence, list) is False:
+            raise TypeError("The inputs should be of type list.")
+        # end if
+        to_hashable = SequencesEncoder.to_hashable
+        return {"sequence": sequence, "keys": tuple([to_hashable(item) for item in sequence]),
+                "signature": None, "positions": None, "array": None}
+    # end create_sequence_profile
+
+    @staticmethod
+    def _get_array(profile: dict):
+        """
+        Return the sequence of the profile converted for SequencesKernels,
+        or False if the items of the sequence are not all int.
+        """
+        if profile["array"] is None:
+            keys = profile["keys"]
+            is_int = all(type(key) is int for key in keys)
+            profile["array"] = SequencesKernels.to_array(keys) if is_int is True else False
+        # end if
+        return profile["array"]
+    # end _get_array
+
+    @staticmethod
+    def _homogeneity_score(profile1: dict, profile2: dict) -> int:
+        """ Return the homogeneity score, the compiled kernel is used for the sequences of int. """
+        if SequencesKernels.is_compiled() is True:
+            array1 = SequencesClustersEvaluation._get_array(profile1)
+            array2 = SequencesClustersEvaluation._get_array(profile2) if array1 is not False else False
+            if array2 is not False:
+                return int(SequencesKernels.homogeneity_kernel(array1, array2))
             # end if
-        # end while
-        for item in copy1 + copy2:
-            if item not in missing:
-                missing.append(item)
+        # end if
+        return SequencesClustersEvaluation.homogeneity_evaluation_from_signatures(
+            SequencesClustersEvaluation._get_signature(profile1),
+            SequencesClustersEvaluation._get_signature(profile2))[0]
+    # end _homogeneity_score
+
+    @staticmethod
+    def _disparity_score(profile1: dict, profile2: dict) -> int:
+        """ Return the disparity score, the compiled kernel is used for the sequences of int. """
+        if SequencesKernels.is_compiled() is True:
+            array1 = SequencesClustersEvaluation._get_array(profile1)
+            array2 = SequencesClustersEvaluation._get_array(profile2) if array1 is not False else False
+            if array2 is not False:
+                return int(SequencesKernels.disparity_kernel(array1, array2))
             # end if
-        # end for
-        return len(missing), missing
-    # end homogeneity_evaluation
+        # end if
+        return SequencesClustersEvaluation.disparity_evaluation_from_profiles(profile1, profile2)[0]
+    # end _disparity_score
+
+    @staticmethod
+    def _get_signature(profile: dict) -> dict:
+        """ Return the signature of the sequence of the profile (see create_homogeneity_signature). """
+        if profile["signature"] is None:
+            signature = dict()
+            for key, item in zip(profile["keys"], profile["sequence"]):
+                if key not in signature:
+                    signature[key] = item
+                # end if
+            # end for
+            profile["signature"] = signature
+        # end if
+        return profile["signature"]
+    # end _get_signature
+
+    @staticmethod
+    def _get_positions(profile: dict) -> dict:
+        """ Return the indexes of each item in the sequence of the profile. """
+        if profile["positions"] is None:
+            positions = dict()
+            for index, key in enumerate(profile["keys"]):
+                positions.setdefault(key, list()).append(index)
+            # end for
+            profile["positions"] = positions
+        # end if
+        return profile["positions"]
+    # end _get_positions
 
     @staticmethod
     def disparity_evaluation(sequence1: list, sequence2: list):
+        """
+        Compute the disparity score of the sequences. The items of the shortest
+        sequence are searched in the longest one, the subsequences found at a
+        different position are counted as shifted.
+        The sequences are not copied: a cursor goes through the shortest
+        sequence and the items removed from the longest sequence are unlinked
+        from a linked list of its indexes.
+
+        Returns
+        -------
+        tuple
+            (The number of missing items + the number of shifted subsequences: int,
+            the missing items: list)
+        """
         if isinstance(sequence1, list) is False or isinstance(sequence2, list) is False:
             raise TypeError("The inputs should be of type list.")
         # end if
         if sequence1 == sequence2:
             return 0, list()
         # end if
-        len1, len2 = len(sequence1), len(sequence2)
-        seq_short, seq_long = sequence1.copy(), sequence2.copy()
-        if len2 < len1:
-            seq_long = seq_short
-            seq_short = sequence2.copy()
+        return SequencesClustersEvaluation.disparity_evaluation_from_profiles(
+            SequencesClustersEvaluation.create_sequence_profile(sequence1),
+            SequencesClustersEvaluation.create_sequence_profile(sequence2))
+    # end disparity_evaluation
+
+    @staticmethod
+    def disparity_evaluation_from_profiles(profile1: dict, profile2: dict):
+        """
+        Compute the disparity score using the profiles of the sequences
+        (see create_sequence_profile and disparity_evaluation).
+        The profiles are not modified, therefore they can be used for many pairs.
+        """
+        sequence1, sequence2 = profile1["sequence"], profile2["sequence"]
+        if sequence1 == sequence2:
+            return 0, list()
+        # end if
+        short_profile, long_profile = profile1, profile2
+        if len(sequence2) < len(sequence1):
+            short_profile, long_profile = profile2, profile1
         # end if
+        seq_short, seq_long = short_profile["sequence"], long_profile["sequence"]
+        short_keys, long_keys = short_profile["keys"], long_profile["keys"]
+        short_size, long_size = len(short_keys), len(long_keys)
+        # Holds the linked list of the remaining indexes of the longest sequence
+        next_index = list(range(1, long_size + 1))
+        previous_index = list(range(-1, long_size - 1))
+        is_removed = [False] * long_size
+        head, long_remaining = 0, long_size
+        # Holds the indexes of each item in the longest sequence and the number remaining
+        positions = SequencesClustersEvaluation._get_positions(long_profile)
+        first_position = dict.fromkeys(positions, 0)
+        counts = {key: len(key_positions) for key, key_positions in positions.items()}
+
+        def remove(index: int):
+            """ Remove the item at index from the longest sequence. """
+            nonlocal head, long_remaining
+            is_removed[index] = True
+            long_remaining -= 1
+            counts[long_keys[index]] -= 1
+            before, after = previous_index[index], next_index[index]
+            if before >= 0:
+                next_index[before] = after
+            else:
+                head = after
+            # end if
+            if after < long_size:
+                previous_index[after] = before
+            # end if
+        # end remove
+
+        def remaining_positions(key):
+            """ Yield the remaining indexes of the item in the longest sequence. """
+            key_positions = positions[key]
+            start = first_position[key]
+            while start < len(key_positions) and is_removed[key_positions[start]] is True:
+                start += 1
+            # end while
+            first_position[key] = start
+            for index in key_positions[start:]:
+                if is_removed[index] is False:
+                    yield index
+                # end if
+            # end for
+        # end remaining_positions
+
+        def are_remaining_equal() -> bool:
+            """ Compare the remaining items of the sequences. """
+            if short_size - cursor != long_remaining:
+                return False
+            # end if
+            index = head
+            for short_index in range(cursor, short_size):
+                if short_keys[short_index] != long_keys[index]:
+                    return False
+                # end if
+                index = next_index[index]
+            # end for
+            return True
+        # end are_remaining_equal
+
         # Holds the missing items
-        missing, subsequences_shifted = list(), list()
-        # count1, count2 = 0, 0
-        while seq_short:
-            if seq_short == seq_long:
-                seq_short, seq_long = list(), list()
+        missing, missing_keys, subsequences_shifted = list(), set(), list()
+        cursor = 0  # Holds the index of the first remaining item of the shortest sequence
+        while cursor < short_size:
+            if are_remaining_equal() is True:
+                cursor, long_remaining = short_size, 0
                 break
             # end if
+            current = short_keys[cursor]
+            short_remaining = short_size - cursor
             do_search = False
-            if seq_short[0] == seq_long[0]:
-                if len(seq_short) == 1:
-                    seq_long = seq_long[1:]
-                elif len(seq_long) > 1 and seq_short[0] in seq_long[1:]:
+            if current == long_keys[head]:
+                if short_remaining == 1:
+                    remove(head)
+                elif long_remaining > 1 and counts[current] > 1:
                     # See if there is a longer subsequence
                     do_search = True
                 else:
-                    seq_long = seq_long[1:]
+                    remove(head)
                 # end if
-            elif seq_short[0] in seq_long:
-                if len(seq_short) == 1:
-                    seq_long.remove(seq_short[0])
-                    subsequences_shifted.append(seq_short[0])
-                    seq_short = list()
+            elif counts.get(current, 0) > 0:
+                if short_remaining == 1:
+                    remove(next(remaining_positions(current)))
+                    subsequences_shifted.append(seq_short[cursor])
+                    cursor = short_size
                 else:
                     do_search = True
                 # end if
             else:
-                missing.append(seq_short[0])
+                missing.append(seq_short[cursor])
+                missing_keys.add(current)
             # end if
             if do_search is True:
-                # start_time1 = time.time()
-                search_result = SequencesClustersEvaluation.find_largest_subsequence_index(seq_short, seq_long)
-                if search_result is not None:
-                    best_index, subsequence_size = search_result
-                    # Holds the subsequence to shift
-                    shifted = seq_short[:subsequence_size]
-                    if best_index > 0:
-                        subsequences_shifted.append(shifted)
+                # Find the first index where the longest part of the remaining items starts
+                best_index, subsequence_size = None, 0
+                for index in remaining_positions(current):
+                    items_found, long_index = 0, index
+                    while (cursor + items_found < short_size and long_index < long_size
+                           and short_keys[cursor + items_found] == long_keys[long_index]):
+                        items_found += 1
+                        long_index = next_index[long_index]
+                    # end while
+                    if best_index is None or subsequence_size < items_found:
+                        best_index, subsequence_size = index, items_found
                     # end if
-                    seq_short = seq_short[subsequence_size:]
-                    seq_long = seq_long[:best_index] + seq_long[best_index + subsequence_size:]
-                else:
-                    pdb.set_trace()
+                    if subsequence_size == short_remaining:
+                        break
+                    # end if
+                # end for
+                if best_index != head:
+                    # Holds the subsequence to shift
+                    subsequences_shifted.append(seq_short[cursor:cursor + subsequence_size])
                 # end if
+                cursor += subsequence_size
+                for _ in range(subsequence_size):
+                    following = next_index[best_index]
+                    remove(best_index)
+                    best_index = following
+                # end for
             else:
-                seq_short = seq_short[1:]
+                cursor += 1
             # end if
         # end while
-        for item in seq_short + seq_long:
-            if item not in missing:
+        remaining = [(short_keys[index], seq_short[index]) for index in range(cursor, short_size)]
+        index = head
+        while long_remaining and index < long_size:
+            remaining.append((long_keys[index], seq_long[index]))
+            index = next_index[index]
+        # end while
+        for key, item in remaining:
+            if key not in missing_keys:
                 missing.append(item)
+                missing_keys.add(key)
             # end if
         # end for
-        return len(missing + subsequences_shifted), missing
-    # end disparity_evaluation
+        return len(missing) + len(subsequences_shifted), missing
+    # end disparity_evaluation_from_profiles
 
     @staticmethod
     def predecessors_evaluation(
@@ -389,65 +656,349 @@ class SequencesClustersEvaluation(object):
     # end predecessors_evaluation
 
     @staticmethod
-    def evaluate_sequences(
-            one: list, to_many: list, eval_homogeneity: bool = True, eval_disparity: bool = True,
-            memoization: dict = None) -> tuple:
-        # Holds the unique sequences
-        unique_sequences = list()
-        key_seq = "unique_sequences"
+    def _get_memoization(memoization) -> SequencesMemoization:
+        """
+        Return the SequencesMemoization to use. A dictionary (the format used
+        before SequencesMemoization) is converted, see _return_memoization.
+        """
+        if isinstance(memoization, SequencesMemoization) is True:
+            return memoization
+        # end if
         if memoization and isinstance(memoization, dict) is True:
-            if key_seq in memoization.keys():
-                unique_sequences = memoization[key_seq]
-            # end if
-        else:
-            memoization = dict()
+            return SequencesMemoization.from_dict(memoization)
+        # end if
+        return SequencesMemoization()
+    # end _get_memoization
+
+    @staticmethod
+    def _return_memoization(memo: SequencesMemoization, memoization):
+        """
+        Return the memoization given back to the caller: memo when the caller gave a
+        SequencesMemoization, otherwise its content as a dictionary. A dictionary given
+        by the caller is updated in place and returned. The dictionary is converted
+        twice by each call, a SequencesMemoization should be given to avoid it.
+        """
+        if isinstance(memoization, SequencesMemoization) is True:
+            return memo
         # end if
-        if one not in unique_sequences:
-            unique_sequences.append(one)
+        content = memo.to_dict()
+        if isinstance(memoization, dict) is True:
+            memoization.clear()
+            memoization.update(content)
+            return memoization
         # end if
-        # Holds the memoization key for one
-        memo_key1 = str(unique_sequences.index(one))
-        # Holds the dictionary keys
-        key_sh, key_sd = "homogeneity", "disparity"
-        key_has_key = "has_key"
+        return content
+    # end _return_memoization
 
-        def calculate_scores(current_sequence: list) -> dict:
-            if memo_key in memoization:
-                score_memo = memoization[memo_key]
-                return {key_has_key: True, key_sh: score_memo[0], key_sd: score_memo[1]}
-            # end if
-            scores = {key_has_key: False, key_sh: None, key_sd: None}
+    @staticmethod
+    def create_homogeneity_bitsets(cluster: list):
+        """
+        Create the bitsets of the distinct items of the sequences of a cluster.
+        Each distinct item of the cluster is given a bit, the homogeneity
+        score of two sequences is then the number of bits set in the XOR of
+        their bitsets.
+
+        Returns
+        -------
+        numpy.ndarray (uint64, one row of words per sequence) or
+        list of int when numpy is not available.
+        """
+        if isinstance(cluster, list) is False:
+            raise TypeError("cluster should be of type list.")
+        # end if
+        # Holds the bit of each distinct item
+        bits = dict()
+        sequences_bits = list()
+        for sequence in cluster:
+            sequence_bits = set()
+            for item in sequence:
+                sequence_bits.add(bits.setdefault(SequencesEncoder.to_hashable(item), len(bits)))
+            # end for
+            sequences_bits.append(sequence_bits)
+        # end for
+        if numpy is None:
+            return [sum(1 << bit for bit in sequence_bits) for sequence_bits in sequences_bits]
+        # end if
+        n_words = max(1, -(-len(bits) // 64))
+        bitsets = numpy.zeros((len(cluster), n_words), dtype=numpy.uint64)
+        for row, sequence_bits in enumerate(sequences_bits):
+            for bit in sequence_bits:
+                bitsets[row, bit // 64] |= numpy.uint64(1 << (bit % 64))
+            # end for
+        # end for
+        return bitsets
+    # end create_homogeneity_bitsets
+
+    @staticmethod
+    def homogeneity_scores_from_bitsets(bitsets, index: int, start: int = 0, end: int = None,
+                                        indexes: list = None) -> list:
+        """
+        Compute the homogeneity scores of the sequence at index against the
+        sequences from start to end, or against the sequences at indexes when
+        given, using the bitsets of the cluster (see create_homogeneity_bitsets).
+
+        Returns
+        -------
+        list of int
+        """
+        if end is None:
+            end = len(bitsets)
+        # end if
+        if numpy is None or isinstance(bitsets, list) is True:
+            one = bitsets[index]
+            others = bitsets[start:end] if indexes is None else [bitsets[other] for other in indexes]
+            return [bin(one ^ other).count("1") for other in others]
+        # end if
+        others = bitsets[start:end] if indexes is None else bitsets[indexes]
+        return SequencesClustersEvaluation._popcount(others ^ bitsets[index]).tolist()
+    # end homogeneity_scores_from_bitsets
+
+    @staticmethod
+    def _popcount(words):
+        """ Return the number of bits set in each row of a 2D array of uint64 words. """
+        if hasattr(numpy, "bitwise_count") is True:
+            return numpy.bitwise_count(words).sum(axis=-1, dtype=numpy.int64)
+        # end if
+        as_bytes = numpy.ascontiguousarray(words).view(numpy.uint8)
+        return numpy.unpackbits(as_bytes, axis=-1).sum(axis=-1, dtype=numpy.int64)
+    # end _popcount
+
+    @staticmethod
+    def check_homogeneity_threshold(cluster: list, max_homogeneity: int = 0) -> dict:
+        """
+        Check if the homogeneity scores of the pairs of sequences of the cluster
+        are all <= max_homogeneity (with max_homogeneity=0: the cluster is pure).
+        The sequences having the same distinct items are only compared once and
+        the check stops at the first pair of sequences exceeding the threshold.
+
+        Returns
+        -------
+        dict {"exceeded": bool, "pair": (index1, index2) of the first pair exceeding
+              the threshold or None, "max_score": the highest score found,
+              "pairs_evaluated": int, "distinct_sequences": int (by distinct items)}
+        """
+        if isinstance(cluster, SequencesEncoder) is True:
+            cluster = cluster.to_list()
+        # end if
+        if isinstance(cluster, list) is False:
+            raise TypeError("cluster should be of type list.")
+        # end if
+        if isinstance(max_homogeneity, int) is False or max_homogeneity < 0:
+            raise TypeError("max_homogeneity should be a non-negative int.")
+        # end if
+        # Holds the index of the first sequence of each distinct set of items
+        indexes = dict()
+        for index, sequence in enumerate(cluster):
+            items = frozenset(SequencesClustersEvaluation.create_homogeneity_signature(sequence))
+            indexes.setdefault(items, index)
+        # end for
+        items_sets, indexes = list(indexes), list(indexes.values())
+        status = {"exceeded": False, "pair": None, "max_score": 0, "pairs_evaluated": 0,
+                  "distinct_sequences": len(items_sets)}
+        bitsets = None
+        if len(items_sets) > 1:
+            bitsets = SequencesClustersEvaluation.create_homogeneity_bitsets([cluster[i] for i in indexes])
+        # end if
+        for outer in range(len(items_sets) - 1):
+            scores = SequencesClustersEvaluation.homogeneity_scores_from_bitsets(bitsets, index=outer, start=outer + 1)
+            for offset, score in enumerate(scores):
+                status["pairs_evaluated"] += 1
+                if score > status["max_score"]:
+                    status["max_score"] = score
+                # end if
+                if score > max_homogeneity:
+                    status["exceeded"] = True
+                    status["pair"] = (indexes[outer], indexes[outer + 1 + offset])
+                    return status
+                # end if
+            # end for
+        # end for
+        return status
+    # end check_homogeneity_threshold
+
+    @staticmethod
+    def evaluate_one_to_many(
+            one: list, to_many: list, eval_homogeneity: bool = True, eval_disparity: bool = True,
+            profile_one: dict = None, profiles: list = None) -> tuple:
+        """
+        Compute the scores of one against each sequence of to_many.
+        one is only prepared once (see create_sequence_profile), the profiles
+        of to_many can be given when they are used for many calls.
+
+        Returns
+        -------
+        tuple (list of the homogeneity scores or None if eval_homogeneity is False,
+               list of the disparity scores or None if eval_disparity is False)
+        """
+        if profile_one is None:
+            profile_one = SequencesClustersEvaluation.create_sequence_profile(one)
+        # end if
+        scores_homogeneity = list() if eval_homogeneity is True else None
+        scores_disparity = list() if eval_disparity is True else None
+        for index, sequence in enumerate(to_many):
+            profile = profiles[index] if profiles is not None else \
+                SequencesClustersEvaluation.create_sequence_profile(sequence)
             if eval_homogeneity is True:
-                score_h = SequencesClustersEvaluation.homogeneity_evaluation(one, current_sequence)
-                scores[key_sh] = score_h[0]
+                scores_homogeneity.append(SequencesClustersEvaluation._homogeneity_score(profile_one, profile))
             # end if
             if eval_disparity is True:
-                score_d = SequencesClustersEvaluation.disparity_evaluation(one, current_sequence)
-                scores[key_sd] = score_d[0]
+                scores_disparity.append(SequencesClustersEvaluation._disparity_score(profile_one, profile))
             # end if
-            return scores
-        # end calculate_scores
+        # end for
+        return scores_homogeneity, scores_disparity
+    # end evaluate_one_to_many
 
-        # Holds the scores
-        result_sh, result_sd = list(), list()
-        for sequence in to_many:
-            # Add the sequence to the unique sequences
-            if sequence not in unique_sequences:
-                unique_sequences.append(sequence)
-            # end if
-            # Holds the memoization key for the sequences
-            memo_key2 = str(unique_sequences.index(sequence))
-            memo_key = f"{memo_key1}->{memo_key2}"
-            # Get the scores and assign the values
-            eval_scores = calculate_scores(sequence)
-            if eval_scores[key_sh] is not None:
-                result_sh.append(eval_scores[key_sh])
-            if eval_scores[key_sd] is not None:
-                result_sd.append(eval_scores[key_sd])
-            if eval_scores[key_has_key] is False:
-                memoization[memo_key] = [eval_scores[key_sh], eval_scores[key_sd]]
+    @staticmethod
+    def evaluate_sequences(
+            one: list, to_many: list, eval_homogeneity: bool = True, eval_disparity: bool = True,
+            memoization=None, homogeneity_scores: list = None, cache: SequencesScoreCache = None,
+            profile_one: dict = None, profiles: list = None, hashes: dict = None, symbols: list = None,
+            precomputed: SequencesMemoization = None) -> tuple:
+        # homogeneity_scores holds the homogeneity scores already computed for to_many (optional).
+        # cache holds the disparity scores computed during the previous runs (optional), they are read
+        # and written at once for the row. The homogeneity is not cached, it is cheaper to compute
+        # (see homogeneity_scores_from_bitsets) than to read.
+        # hashes holds the content hash of each memoization id (optional), it is updated and is shared
+        # by the rows of a cluster so that each sequence is only hashed once.
+        # symbols holds the symbols of the sequences encoded with SequencesEncoder (optional).
+        # precomputed holds the scores computed by another process (optional), they are used
+        # instead of computing the scores.
+        # profile_one, profiles hold the profiles of one and to_many (optional, see evaluate_one_to_many).
+        # The scores that are neither in the memoization nor in the cache are computed at once
+        # with evaluate_one_to_many.
+        memo = SequencesClustersEvaluation._get_memoization(memoization)
+        # one is only prepared once
+        if profile_one is None:
+            profile_one = SequencesClustersEvaluation.create_sequence_profile(one)
+        # end if
+        if profiles is None:
+            profiles = [SequencesClustersEvaluation.create_sequence_profile(sequence) for sequence in to_many]
+        # end if
+        # Holds the memoization id of one and of each sequence of to_many
+        memo_id1 = memo.get_id(one, key=profile_one["keys"])
+        ids = list()
+        if hashes is None:
+            hashes = dict()
+        # end if
+        # Holds the variant of the disparity scores in the cache
+        key_sd = "disparity"
+        # Holds the scores [homogeneity, disparity] of each distinct sequence of to_many
+        pairs = dict()
+        # Holds the ids of the pairs to store in the memoization
+        to_store = list()
+        # Holds the indexes in to_many of the homogeneity and of the disparity scores to compute
+        missing = ([], [])
+        # Holds the content hashes of each pair for the disparity
+        pair_hashes = dict()
+        # Holds the indexes in to_many of the disparity scores to read from the cache
+        lookups = list()
+        for index, sequence in enumerate(to_many):
+            memo_id2 = memo.get_id(sequence, key=profiles[index]["keys"])
+            ids.append(memo_id2)
+            if memo_id2 in pairs:
+                # The pair is already in this row
+                continue
+            # end if
+            # The homogeneity does not depend on the order of the pair, nor does the
+            # disparity when the sizes differ (the shortest sequence is always searched).
+            is_disparity_symmetric = len(one) != len(sequence)
+            symmetric = (0, 1) if is_disparity_symmetric is True else (0,)
+            score_memo = memo.get(memo_id1, memo_id2, symmetric=symmetric)
+            scores = [None, None] if score_memo is None else list(score_memo)
+            pairs[memo_id2] = scores
+            if score_memo is not None and (eval_homogeneity is False or scores[0] is not None) and \
+                    (eval_disparity is False or scores[1] is not None):
+                continue
+            # end if
+            # The missing scores are computed and the pair is stored again
+            to_store.append(memo_id2)
+            if eval_homogeneity is True and scores[0] is None:
+                if homogeneity_scores is not None:
+                    scores[0] = homogeneity_scores[index]
+                else:
+                    missing[0].append(index)
+                # end if
+            # end if
+            if eval_disparity is True and scores[1] is None:
+                if cache is not None:
+                    for memo_id, item in [(memo_id1, one), (memo_id2, sequence)]:
+                        if memo_id not in hashes:
+                            hashes[memo_id] = SequencesScoreCache.content_hash(item, symbols=symbols)
+                        # end if
+                    # end for
+                    pair_hashes[index] = (hashes[memo_id1], hashes[memo_id2])
+                    if is_disparity_symmetric is True:
+                        pair_hashes[index] = tuple(sorted(pair_hashes[index]))
+                    # end if
+                    lookups.append(index)
+                else:
+                    missing[1].append(index)
+                # end if
             # end if
         # end for to_many
+        if lookups:
+            cached = cache.get_many([pair_hashes[index] for index in lookups], key_sd)
+            for index, score in zip(lookups, cached):
+                if score is None:
+                    missing[1].append(index)
+                else:
+                    pairs[ids[index]][1] = score
+                # end if
+            # end for
+        # end if
+        # Holds the id of one in precomputed
+        precomputed_id1 = None
+        if precomputed is not None and (missing[0] or missing[1]):
+            precomputed_id1 = precomputed.find_id(one, key=profile_one["keys"])
+        # end if
+        for metric in range(2):
+            if not missing[metric]:
+                continue
+            # end if
+            # Holds the indexes of the scores that are not precomputed
+            to_compute = missing[metric]
+            if precomputed_id1 is not None:
+                to_compute = list()
+                for index in missing[metric]:
+                    precomputed_id2 = precomputed.find_id(to_many[index], key=profiles[index]["keys"])
+                    score = None
+                    if precomputed_id2 is not None:
+                        scores = precomputed.get(precomputed_id1, precomputed_id2,
+                                                 symmetric=(0, 1) if len(one) != len(to_many[index]) else (0,))
+                        score = scores[metric] if scores is not None else None
+                    # end if
+                    if score is None:
+                        to_compute.append(index)
+                    else:
+                        pairs[ids[index]][metric] = score
+                    # end if
+                # end for
+            # end if
+            if to_compute:
+                computed = SequencesClustersEvaluation.evaluate_one_to_many(
+                    one=one, to_many=[to_many[index] for index in to_compute],
+                    eval_homogeneity=metric == 0, eval_disparity=metric == 1, profile_one=profile_one,
+                    profiles=[profiles[index] for index in to_compute])[metric]
+                for index, score in zip(to_compute, computed):
+                    pairs[ids[index]][metric] = score
+                # end for
+            # end if
+        # end for
+        if cache is not None and missing[1]:
+            cache.set_many([pair_hashes[index] + (key_sd, pairs[ids[index]][1]) for index in missing[1]])
+        # end if
+        for memo_id2 in to_store:
+            memo.set(memo_id1, memo_id2, pairs[memo_id2])
+        # end for
+        # Holds the scores
+        result_sh, result_sd = list(), list()
+        for memo_id2 in ids:
+            score_h, score_d = pairs[memo_id2]
+            if score_h is not None:
+                result_sh.append(score_h)
+            if score_d is not None:
+                result_sd.append(score_d)
+        # end for
         scores_homogeneity, scores_disparity = None, None
         if result_sh:
             scores_homogeneity = [min(result_sh), max(result_sh)]
@@ -455,21 +1006,24 @@ class SequencesClustersEvaluation(object):
         if result_sd:
             scores_disparity = [min(result_sd), max(result_sd)]
         # end if
-        memoization[key_seq] = unique_sequences
-        return scores_homogeneity, scores_disparity, memoization
+        return scores_homogeneity, scores_disparity, SequencesClustersEvaluation._return_memoization(memo, memoization)
     # end evaluate_sequences
 
     @staticmethod
+    @Instrumentation.instrument("evaluate_cluster", items="cluster")
     def evaluate_cluster(
             cluster: list, eval_homogeneity: bool = True, eval_disparity: bool = True,
-            eval_disparity_if_homogeneity_is_zero: bool = True, memoization: dict = None) -> tuple:
+            eval_disparity_if_homogeneity_is_zero: bool = True, memoization=None,
+            cache: SequencesScoreCache = None, deduplicate: bool = False,
+            precomputed: SequencesMemoization = None, max_homogeneity: int = None,
+            status: dict = None) -> tuple:
         """
         Calculate the Condition 1 (C1),
         Condition 2 (C2) scores of the cluster.
 
         Parameters
         ----------
-        cluster : list
+        cluster : list or SequencesEncoder
             A list of sequences (list) in the cluster.
         eval_homogeneity : bool, optional
             When True, will calculate the homogeneity score.
@@ -480,9 +1034,35 @@ class SequencesClustersEvaluation(object):
         eval_disparity_if_homogeneity_is_zero : bool, optional
             When True, disparity will be calculated only if homogeneity == 0.
             The default is True.
-        memoization : dict, optional
+        memoization : SequencesMemoization or dict, optional
             This is used for faster computing. It only helps if there are duplicates of the sequences.
+            A dict is returned when a dict (or None) is provided, a given dict is updated in place.
+            The default is None.
+        cache : SequencesScoreCache, optional
+            The persistent cache of the disparity scores of the pairs of sequences.
             The default is None.
+        deduplicate : bool, optional
+            When True, the identical sequences of the cluster are collapsed and each
+            sequence is only compared to the distinct sequences that follow it. The
+            scores of a row are reused for the next occurrences of the same sequence
+            having the same distinct sequences after it. The scores are the same as
+            when comparing all the pairs.
+            The default is False.
+        precomputed : SequencesMemoization, optional
+            The scores of the pairs computed by another process (see evaluate_model
+            with n_jobs). They are used instead of computing the scores missing from
+            memoization and cache, therefore memoization and cache are updated as if
+            the scores were computed. The default is None.
+        max_homogeneity : int, optional
+            When set, the cluster is first checked with check_homogeneity_threshold
+            (use 0 to check if the cluster is pure). When a pair of sequences exceeds
+            the threshold, the cluster is not evaluated and the scores are None. When
+            both eval_homogeneity and eval_disparity are False, only the check is done.
+            The default is None (no threshold).
+        status : dict, optional
+            A dict updated in place with the result of the check when max_homogeneity
+            is set (see check_homogeneity_threshold), which tells apart the scores None
+            of a cluster exceeding the threshold. The default is None.
 
         Returns
         -------
@@ -490,29 +1070,104 @@ class SequencesClustersEvaluation(object):
             [minimum, maximum, average] scores.
         scores_disparity : list (None if disparity was not calculated.)
             [minimum, maximum, average] scores.
+        memoization : SequencesMemoization or dict
 
         """
+        # Holds the symbols of the encoded sequences, the cache stores the scores by action names
+        symbols = None
+        if isinstance(cluster, SequencesEncoder) is True:
+            symbols = cluster.symbols
+            cluster = cluster.to_list()
+        # end if
+        if max_homogeneity is not None:
+            check = SequencesClustersEvaluation.check_homogeneity_threshold(cluster, max_homogeneity)
+            if status is not None:
+                status.update(check)
+            # end if
+            if check["exceeded"] is True or (eval_homogeneity is False and eval_disparity is False):
+                return None, None, memoization
+            # end if
+        # end if
         cluster_size = len(cluster)
         if cluster_size <= 1:
-            return None, None, None, memoization
-        # end if
-        if not memoization or isinstance(memoization, dict) is False:
-            memoization = dict()
+            return None, None, memoization
         # end if
+        memo = SequencesClustersEvaluation._get_memoization(memoization)
         scores_homogeneity = None if eval_homogeneity is False else [0.0, 0.0, 0.0]
         scores_disparity = None if eval_disparity is False else [0.0, 0.0, 0.0]
         # Compute the number of comparison to be done
         n_comparison = cluster_size * (cluster_size - 1)  # - 1 because of the inner loop
+        # Holds the sequences compared, the distinct sequences when deduplicate is True
+        sequences = cluster
+        if deduplicate is True:
+            # Holds the memoization id of each sequence and the last position of each id
+            ids = [memo.get_id(sequence) for sequence in cluster]
+            last_positions = dict()
+            for position, sequence_id in enumerate(ids):
+                last_positions[sequence_id] = position
+            # end for
+            # The distinct sequences are sorted by last position, therefore the distinct
+            # sequences after a position are the ones from a boundary to the end.
+            distinct_ids = sorted(last_positions, key=last_positions.get)
+            sequences = [memo.sequences[sequence_id] for sequence_id in distinct_ids]
+            distinct_positions = {sequence_id: position for position, sequence_id in enumerate(distinct_ids)}
+            boundary = 0
+            # Holds the scores of each (id, boundary, eval_disparity) row
+            rows = dict()
+        # end if
+        # The homogeneity scores of each sequence against the remaining ones are computed at once,
+        # one row at a time (see homogeneity_scores_from_bitsets)
+        bitsets = None
+        if eval_homogeneity is True:
+            bitsets = SequencesClustersEvaluation.create_homogeneity_bitsets(sequences)
+        # end if
+        # Holds the profiles of the sequences, they are created when first needed
+        profiles = None
+        # Holds the content hash of each sequence for the cache
+        hashes = dict()
         for outer in range(cluster_size):
             sequence_outer = cluster[outer]
             if outer < cluster_size:
-                sequence_remaining = cluster[outer + 1:]
+                # Holds the index of the outer sequence and the start of the remaining ones in sequences
+                index, start = outer, outer + 1
+                if deduplicate is True:
+                    if outer == cluster_size - 1:
+                        continue
+                    # end if
+                    while last_positions[distinct_ids[boundary]] <= outer:
+                        boundary += 1
+                    # end while
+                    index, start = distinct_positions[ids[outer]], boundary
+                    row_key = (ids[outer], boundary, eval_disparity)
+                # end if
+                sequence_remaining = sequences[start:]
                 if not sequence_remaining:
                     continue
                 # end if
-                scores_h, scores_d, memoization = SequencesClustersEvaluation.evaluate_sequences(
-                    one=sequence_outer, to_many=sequence_remaining, eval_homogeneity=eval_homogeneity,
-                    eval_disparity=eval_disparity, memoization=memoization)
+                if deduplicate is True and row_key in rows:
+                    scores_h, scores_d = rows[row_key]
+                else:
+                    homogeneity_scores = None
+                    if bitsets is not None:
+                        homogeneity_scores = SequencesClustersEvaluation.homogeneity_scores_from_bitsets(
+                            bitsets, index=index, start=start)
+                    # end if
+                    if profiles is None:
+                        # The sequences are only prepared once for all the pairs
+                        profiles = [SequencesClustersEvaluation.create_sequence_profile(sequence)
+                                    for sequence in sequences]
+                    # end if
+                    # The pairs are always stored in the memoization, even when only the homogeneity is needed
+                    scores_h, scores_d, memo = SequencesClustersEvaluation.evaluate_sequences(
+                        one=sequence_outer, to_many=sequence_remaining, eval_homogeneity=eval_homogeneity,
+                        eval_disparity=eval_disparity, memoization=memo,
+                        homogeneity_scores=homogeneity_scores, cache=cache,
+                        profile_one=profiles[index], profiles=profiles[start:], hashes=hashes, symbols=symbols,
+                        precomputed=precomputed)
+                    if deduplicate is True:
+                        rows[row_key] = (scores_h, scores_d)
+                    # end if
+                # end if
                 if scores_homogeneity is not None and scores_h is not None:
                     scores_homogeneity[0] += min(scores_h)
                     scores_homogeneity[1] += max(scores_h)
@@ -537,13 +1192,275 @@ class SequencesClustersEvaluation(object):
                 s[2] = (s[0] + s[1]) / 2
             # end if
         # end for
-        return scores_homogeneity, scores_disparity, memoization
+        return scores_homogeneity, scores_disparity, SequencesClustersEvaluation._return_memoization(memo, memoization)
     # end evaluate_cluster
 
     @staticmethod
+    def _estimate_scores(sums: list, values: list, factor: float, n_comparison: int, confidence: float,
+                         counts: dict, exact: bool) -> dict:
+        """ Return the estimates of the scores of a cluster (see evaluate_cluster_sampled). """
+        minimum = sums[0] * factor / n_comparison
+        maximum = sums[1] * factor / n_comparison
+        average = (minimum + maximum) / 2
+        interval = None
+        if exact is True:
+            interval = (average, average)
+        elif len(values) >= SequencesClustersEvaluation.MIN_SAMPLED_ROWS:
+            # The variance of the average between the rows, which includes the variance within the rows
+            margin = statistics.NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(
+                statistics.variance(values) / len(values))
+            interval = (max(0.0, average - margin), average + margin)
+        # end if
+        estimates = {"min": minimum, "max": maximum, "average": average, "interval": interval}
+        estimates.update(counts)
+        return estimates
+    # end _estimate_scores
+
+    @staticmethod
+    @Instrumentation.instrument("evaluate_cluster_sampled", items="cluster")
+    def evaluate_cluster_sampled(
+            cluster: list, sample_size: int = 1000, seed: int = None, stratified: bool = False,
+            eval_homogeneity: bool = True, eval_disparity: bool = True,
+            eval_disparity_if_homogeneity_is_zero: bool = True, confidence: float = 0.95,
+            memoization=None, cache: SequencesScoreCache = None) -> tuple:
+        """
+        Estimate the scores of the cluster (see evaluate_cluster) by evaluating at
+        most sample_size pairs of sequences. A row holds the pairs of a sequence with
+        the sequences that follow it. sqrt(sample_size) random rows (at least
+        MIN_SAMPLED_ROWS) are picked and sample_size / the number of rows random
+        pairs are evaluated in each of them, the minimum and maximum scores of the rows are summed like in
+        evaluate_cluster and the sums are scaled by the number of rows. This is
+        used when the cluster is too large to evaluate all the pairs.
+        When the cluster has at most sample_size pairs, all the pairs are evaluated
+        and the scores are the ones of evaluate_cluster.
+
+        Notes
+        -----
+        The minimum (maximum) of the pairs evaluated in a row can be larger (smaller)
+        than the one of the row, the "min" estimate is therefore biased upwards and
+        the "max" estimate downwards when the rows are not evaluated entirely.
+
+        Parameters
+        ----------
+        cluster : list or SequencesEncoder
+            A list of sequences (list) in the cluster.
+        sample_size : int, optional
+            The maximum number of pairs of sequences to evaluate. The default is 1000.
+        seed : int, optional
+            The seed of the random rows and pairs. The default is None.
+        stratified : bool, optional
+            When True, the rows are sorted by distinct sequence and picked at a
+            regular interval from a random start, therefore the number of rows of
+            each distinct sequence is proportional to its number of copies. When
+            False, the rows are picked uniformly. The default is False.
+        eval_homogeneity, eval_disparity, eval_disparity_if_homogeneity_is_zero, memoization, cache :
+            See evaluate_cluster.
+        confidence : float, optional
+            The confidence level of the interval of the average. The default is 0.95.
+
+        Returns
+        -------
+        scores_homogeneity : dict (None if eval_homogeneity is False.)
+            {"min", "max", "average": the estimated [minimum, maximum, average] scores,
+             "interval": (low, high) the confidence interval of the average, computed
+             over the rows evaluated (None when less than MIN_SAMPLED_ROWS rows are
+             evaluated, (average, average) when all the pairs are evaluated),
+             "rows_scored": int, "rows_total": int, "pairs_scored": int, "pairs_total": int}
+        scores_disparity : dict (None if disparity was not calculated.)
+            See scores_homogeneity.
+        memoization : SequencesMemoization or dict
+        """
+        # Holds the symbols of the encoded sequences, the cache stores the scores by action names
+        symbols = None
+        if isinstance(cluster, SequencesEncoder) is True:
+            symbols = cluster.symbols
+            cluster = cluster.to_list()
+        # end if
+        if isinstance(cluster, list) is False:
+            raise TypeError("cluster should be of type list.")
+        # end if
+        if isinstance(sample_size, int) is False or sample_size <= 0:
+            raise TypeError("sample_size should be a positive int.")
+        # end if
+        memo = SequencesClustersEvaluation._get_memoization(memoization)
+        cluster_size = len(cluster)
+        if cluster_size <= 1:
+            return None, None, SequencesClustersEvaluation._return_memoization(memo, memoization)
+        # end if
+        n_comparison = cluster_size * (cluster_size - 1)
+        pairs_total = n_comparison // 2
+        # The last sequence has no row
+        rows_total = cluster_size - 1
+        exact = pairs_total <= sample_size
+        rng = random.Random(seed)
+        if exact is True:
+            rows, row_size = list(range(rows_total)), rows_total
+        else:
+            rows_count = min(rows_total, sample_size, max(SequencesClustersEvaluation.MIN_SAMPLED_ROWS,
+                                                          math.isqrt(sample_size)))
+            # Holds the maximum number of pairs evaluated in a row
+            row_size = sample_size // rows_count
+            if stratified is False:
+                rows = rng.sample(range(rows_total), rows_count)
+            else:
+                # Holds the index of the first copy of each distinct sequence
+                first_indexes = dict()
+                for index, sequence in enumerate(cluster[:rows_total]):
+                    first_indexes.setdefault(SequencesMemoization.key(sequence), index)
+                # end for
+                order = sorted(range(rows_total), key=lambda i: (
+                    first_indexes[SequencesMemoization.key(cluster[i])], i))
+                step = rows_total / rows_count
+                start = rng.random() * step
+                rows = [order[min(rows_total - 1, int(start + position * step))] for position in range(rows_count)]
+            # end if
+        # end if
+        # The rows are evaluated in order, as in evaluate_cluster
+        rows.sort()
+        bitsets = None
+        if eval_homogeneity is True:
+            bitsets = SequencesClustersEvaluation.create_homogeneity_bitsets(cluster)
+        # end if
+        profiles = [SequencesClustersEvaluation.create_sequence_profile(sequence) for sequence in cluster]
+        # Holds the content hash of each sequence for the cache
+        hashes = dict()
+        # Holds the sums of the [minimum, maximum] scores of the rows and the average score of each row
+        sums = [[0.0, 0.0] if eval_homogeneity is True else None, [0.0, 0.0] if eval_disparity is True else None]
+        values = [list(), list()]
+        pairs_scored = 0
+        for outer in rows:
+            if cluster_size - 1 - outer <= row_size:
+                indexes = list(range(outer + 1, cluster_size))
+            else:
+                indexes = sorted(rng.sample(range(outer + 1, cluster_size), row_size))
+            # end if
+            homogeneity_scores = None
+            if bitsets is not None:
+                homogeneity_scores = SequencesClustersEvaluation.homogeneity_scores_from_bitsets(
+                    bitsets, index=outer, indexes=indexes)
+            # end if
+            scores_h, scores_d, memo = SequencesClustersEvaluation.evaluate_sequences(
+                one=cluster[outer], to_many=[cluster[index] for index in indexes], eval_homogeneity=eval_homogeneity,
+                eval_disparity=eval_disparity, memoization=memo, homogeneity_scores=homogeneity_scores,
+                cache=cache, profile_one=profiles[outer], profiles=[profiles[index] for index in indexes],
+                hashes=hashes, symbols=symbols)
+            pairs_scored += len(indexes)
+            for metric, scores in enumerate([scores_h, scores_d]):
+                if sums[metric] is None or scores is None:
+                    continue
+                # end if
+                if metric == 1 and eval_disparity_if_homogeneity_is_zero is True and max(scores) > 0:
+                    eval_disparity = False
+                    sums[1] = None
+                    continue
+                # end if
+                sums[metric][0] += min(scores)
+                sums[metric][1] += max(scores)
+                values[metric].append((min(scores) + max(scores)) / 2 * rows_total / n_comparison)
+            # end for
+        # end for
+        counts = {"rows_scored": len(rows), "rows_total": rows_total,
+                  "pairs_scored": pairs_scored, "pairs_total": pairs_total}
+        scores_homogeneity, scores_disparity = [
+            None if sums[metric] is None else SequencesClustersEvaluation._estimate_scores(
+                sums[metric], values[metric], rows_total / len(rows), n_comparison, confidence, counts, exact)
+            for metric in range(2)]
+        return scores_homogeneity, scores_disparity, SequencesClustersEvaluation._return_memoization(memo, memoization)
+    # end evaluate_cluster_sampled
+
+    @staticmethod
+    def _evaluate_cluster_job(cluster: list, parameters: dict, memoization: SequencesMemoization,
+                              cache_path: str = None) -> SequencesMemoization:
+        """
+        Compute the scores of the pairs of sequences of a cluster. This is the unit
+        of work sent to the processes by evaluate_model. The scores found in the
+        cache are read but the cache is not written.
+
+        Returns
+        -------
+        SequencesMemoization
+            memoization holding the scores of the pairs of the cluster.
+        """
+        cache = None
+        if cache_path is not None:
+            cache = SequencesScoreCache(path=cache_path, read_only=True)
+        # end if
+        SequencesClustersEvaluation.evaluate_cluster(
+            cluster=cluster, memoization=memoization, cache=cache, **parameters)
+        if cache is not None:
+            cache.close()
+        # end if
+        return memoization
+    # end _evaluate_cluster_job
+
+    @staticmethod
+    def _evaluate_clusters_in_parallel(model: list, parameters: dict, memoization: SequencesMemoization,
+                                       cache: SequencesScoreCache = None, n_jobs: int = -1, executor=None) -> dict:
+        """
+        Compute the scores of the pairs of sequences of the clusters of the model
+        (of size > 1) using a process pool, the largest clusters are submitted first.
+        Each cluster is sent with the pairs of memoization stored for its sequences
+        and with the eval_disparity of evaluate_model when it reaches the cluster:
+        the disparity is not evaluated after the first cluster that is not pure when
+        eval_disparity_if_homogeneity_is_zero is True (eval_homogeneity should then be True).
+
+        Returns
+        -------
+        dict {cluster index: SequencesMemoization (see _evaluate_cluster_job)}
+        """
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        # end if
+        # Holds the cluster and the parameters of each job
+        jobs = dict()
+        eval_disparity = parameters["eval_disparity"]
+        for index, cluster in enumerate(model):
+            # The invalid clusters are left to evaluate_model, which raises the error.
+            # The encoded clusters are sent as they are, their symbols are used by the cache.
+            if isinstance(cluster, (list, SequencesEncoder)) is False or len(cluster) <= 1:
+                continue
+            # end if
+            jobs[index] = (cluster, dict(parameters, eval_disparity=eval_disparity))
+            if eval_disparity is True and parameters["eval_disparity_if_homogeneity_is_zero"] is True:
+                status = SequencesClustersEvaluation.check_homogeneity_threshold(cluster, 0)
+                eval_disparity = status["exceeded"] is False
+            # end if
+        # end for
+        order = sorted(jobs, key=lambda i: len(jobs[i][0]), reverse=True)
+        cache_path = cache.path if cache is not None else None
+        if cache is not None:
+            # The processes read the scores written so far
+            cache.flush()
+        # end if
+
+        def submit_all(pool) -> dict:
+            futures = dict()
+            for index in order:
+                cluster, cluster_parameters = jobs[index]
+                sequences = cluster.to_list() if isinstance(cluster, SequencesEncoder) is True else cluster
+                futures[index] = pool.submit(
+                    SequencesClustersEvaluation._evaluate_cluster_job, cluster, cluster_parameters,
+                    memoization.extract(sequences), cache_path)
+            # end for
+            return {index: future.result() for index, future in futures.items()}
+        # end submit_all
+
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                return submit_all(pool)
+            # end with
+        # end if
+        return submit_all(executor)
+    # end _evaluate_clusters_in_parallel
+
+    @staticmethod
+    @Instrumentation.instrument("evaluate_model", items="model")
     def evaluate_model(
             model: list, eval_homogeneity: bool = True, eval_disparity: bool = True,
-            eval_disparity_if_homogeneity_is_zero: bool = True, memoization: dict = None
+            eval_disparity_if_homogeneity_is_zero: bool = True, memoization=None,
+            cache: SequencesScoreCache = None, deduplicate: bool = False,
+            n_jobs: int = 1, executor=None, max_homogeneity: int = None,
+            sample_size: int = None, seed: int = None, stratified: bool = False
     ) -> tuple:
         """
 
@@ -551,7 +1468,9 @@ class SequencesClustersEvaluation(object):
         Parameters
         ----------
         model : list
-            DESCRIPTION.
+            A list of clusters (list or SequencesEncoder). The clusters
+            encoded with SequencesEncoder should share the same symbols
+            (see SequencesEncoder.encode_model).
         eval_homogeneity : bool, optional
             When True, will calculate the homogeneity score.
             The default is True.
@@ -561,10 +1480,59 @@ class SequencesClustersEvaluation(object):
         eval_disparity_if_homogeneity_is_zero : bool, optional
             When True, disparity will be calculated only if homogeneity == 0.
             The default is True.
-        memoization : dict, optional
+        memoization : SequencesMemoization or dict, optional
             This is used for faster computing. It only helps
             if there are duplicates of the sequences.
+            A dict is returned when a dict (or None) is provided, a given dict is updated in place.
+            The default is None.
+        cache : SequencesScoreCache, optional
+            The persistent cache of the disparity scores of the pairs of sequences.
+            When provided, the number of hits and misses of the cache is
+            added to the scores with the key "cache".
             The default is None.
+        deduplicate : bool, optional
+            When True, the identical sequences of each cluster are collapsed
+            (see evaluate_cluster).
+            The default is False.
+        n_jobs : int, optional
+            The number of processes used to evaluate the clusters. Set to -1
+            to use all the CPUs. The clusters are sent to the processes from the
+            largest to the smallest with the pairs of memoization stored for their
+            sequences. The clusters are then evaluated in the order of the model
+            with the scores computed by the processes (see evaluate_cluster with
+            precomputed), therefore the scores, memoization and cache are the same
+            as with n_jobs=1. The processes are not used when eval_homogeneity is
+            False and eval_disparity_if_homogeneity_is_zero is True, since the
+            disparity of a cluster then depends on the disparity of the previous
+            ones. The default is 1 (no process is created).
+        executor : concurrent.futures.Executor, optional
+            The executor used to evaluate the clusters instead of a new process
+            pool. The executor is not shut down. The default is None.
+        max_homogeneity : int, optional
+            When set, each cluster is first checked with check_homogeneity_threshold
+            (use 0 to check if the clusters are pure) and the evaluation stops at the
+            first cluster exceeding the threshold. The result of the checks is added
+            to the scores with the key "threshold": {"exceeded": bool, "cluster": index
+            of the cluster exceeding the threshold or None, "pair": the pair of sequences
+            in that cluster, "max_score": int, "clusters_evaluated": int,
+            "pairs_evaluated": int}. The scores are then averaged over the clusters
+            before the cluster exceeding the threshold (None when it is the first one).
+            When both eval_homogeneity and eval_disparity are False, only the checks
+            are done. The default is None (no threshold).
+        sample_size : int, optional
+            When set, the [min, max, average] scores of each cluster are estimated by
+            evaluating at most sample_size pairs of sequences (see evaluate_cluster_sampled).
+            The estimates of each cluster are added to the scores with the key "sampling":
+            {"clusters": {cluster index: {"homogeneity": dict, "disparity": dict}},
+            "pairs_scored": int, "pairs_total": int}.
+            The clusters are evaluated in this process (n_jobs is not used) and
+            max_homogeneity cannot be set.
+            The default is None (all the pairs are evaluated).
+        seed : int, optional
+            The seed of the random pairs, the seed of a cluster is seed + the index
+            of the cluster. The default is None.
+        stratified : bool, optional
+            See evaluate_cluster_sampled. The default is False.
 
         Raises
         ------
@@ -581,9 +1549,50 @@ class SequencesClustersEvaluation(object):
         model_size = len(model)
         # Holds the keys
         key_h, key_d = "homogeneity", "disparity"
+        key_cache = "cache"
+        key_threshold = "threshold"
+        key_sampling = "sampling"
         if model_size <= 1:
             return {key_d: None, key_h: None}, key_h, key_d, memoization
         # end if
+        if isinstance(n_jobs, int) is False or n_jobs == 0:
+            raise TypeError("n_jobs should be a non-zero int.")
+        # end if
+        if sample_size is not None and max_homogeneity is not None:
+            raise Exception("sample_size and max_homogeneity cannot be used together.")
+        # end if
+        memo = SequencesClustersEvaluation._get_memoization(memoization)
+        # Holds the number of clusters the scores are averaged over
+        clusters_count = model_size
+        # Holds the result of the threshold check of each cluster until the first cluster exceeding
+        # the threshold, the clusters from that one are not evaluated
+        statuses = dict()
+        if max_homogeneity is not None:
+            for cluster_index, cluster in enumerate(model):
+                # The invalid clusters are left to the loop of the model, which raises the error
+                if isinstance(cluster, (list, SequencesEncoder)) is False or len(cluster) <= 1:
+                    continue
+                # end if
+                statuses[cluster_index] = SequencesClustersEvaluation.check_homogeneity_threshold(
+                    cluster, max_homogeneity)
+                if statuses[cluster_index]["exceeded"] is True:
+                    clusters_count = cluster_index
+                    break
+                # end if
+            # end for
+        # end if
+        # Holds the scores computed by the processes for each cluster, the clusters are then evaluated
+        # in order with these scores, therefore the results are the same as with n_jobs=1
+        parallel_results = dict()
+        if sample_size is None and (executor is not None or n_jobs != 1) and (eval_homogeneity is True or (
+                eval_disparity is True and eval_disparity_if_homogeneity_is_zero is False)):
+            parallel_results = SequencesClustersEvaluation._evaluate_clusters_in_parallel(
+                model=model[:clusters_count], parameters={
+                    "eval_homogeneity": eval_homogeneity, "eval_disparity": eval_disparity,
+                    "eval_disparity_if_homogeneity_is_zero": eval_disparity_if_homogeneity_is_zero,
+                    "deduplicate": deduplicate},
+                memoization=memo, cache=cache, n_jobs=n_jobs, executor=executor)
+        # end if
         # Holds the scores
         model_scores = {key_h: [[0.0, 0.0, 0.0], list()], key_d: [[0.0, 0.0, 0.0], list()]}
         if eval_homogeneity is False:
@@ -593,7 +1602,25 @@ class SequencesClustersEvaluation(object):
             model_scores[key_d] = None
         # end if
         size1_clusters = 0  # Holds the number of clusters of size 1
-        for _, cluster in enumerate(model):
+        # Holds the result of the threshold checks
+        threshold = None
+        if max_homogeneity is not None:
+            threshold = {"exceeded": False, "cluster": None, "pair": None, "max_score": 0,
+                         "clusters_evaluated": 0, "pairs_evaluated": 0}
+            model_scores[key_threshold] = threshold
+        # end if
+        # Holds the estimates of the clusters when the pairs are sampled
+        sampling = None
+        if sample_size is not None:
+            sampling = {"clusters": dict(), "pairs_scored": 0, "pairs_total": 0}
+            model_scores[key_sampling] = sampling
+        # end if
+        for cluster_index, cluster in enumerate(model):
+            # The encoded clusters are evaluated as they are, their symbols are used by the cache
+            evaluated = cluster
+            if isinstance(cluster, SequencesEncoder) is True:
+                cluster = cluster.to_list()
+            # end if
             if not cluster or isinstance(cluster, list) is False:
                 raise TypeError("The items in the model should be non-empty and of type list.")
             # end if
@@ -601,10 +1628,46 @@ class SequencesClustersEvaluation(object):
                 size1_clusters += 1
                 continue
             # end if
-            scores_homogeneity, scores_disparity, memoization = SequencesClustersEvaluation.evaluate_cluster(
-                cluster=cluster, eval_homogeneity=eval_homogeneity, memoization=memoization,
-                eval_disparity=eval_disparity,
-                eval_disparity_if_homogeneity_is_zero=eval_disparity_if_homogeneity_is_zero)
+            if threshold is not None:
+                status = statuses[cluster_index]
+                threshold["clusters_evaluated"] += 1
+                threshold["pairs_evaluated"] += status["pairs_evaluated"]
+                threshold["max_score"] = max(threshold["max_score"], status["max_score"])
+                if status["exceeded"] is True:
+                    threshold["exceeded"] = True
+                    threshold["cluster"] = cluster_index
+                    threshold["pair"] = status["pair"]
+                    break
+                # end if
+                if eval_homogeneity is False and eval_disparity is False:
+                    # Only the check is done
+                    continue
+                # end if
+            # end if
+            if sampling is not None:
+                estimates_h, estimates_d, memo = SequencesClustersEvaluation.evaluate_cluster_sampled(
+                    cluster=evaluated, sample_size=sample_size, seed=None if seed is None else seed + cluster_index,
+                    stratified=stratified, eval_homogeneity=eval_homogeneity, eval_disparity=eval_disparity,
+                    eval_disparity_if_homogeneity_is_zero=eval_disparity_if_homogeneity_is_zero,
+                    memoization=memo, cache=cache)
+                sampling["clusters"][cluster_index] = {key_h: estimates_h, key_d: estimates_d}
+                for estimates in [estimates_h, estimates_d]:
+                    if estimates is not None:
+                        sampling["pairs_scored"] += estimates["pairs_scored"]
+                        sampling["pairs_total"] += estimates["pairs_total"]
+                        break
+                    # end if
+                # end for
+                scores_homogeneity, scores_disparity = [
+                    None if estimates is None else [estimates["min"], estimates["max"], estimates["average"]]
+                    for estimates in [estimates_h, estimates_d]]
+            else:
+                scores_homogeneity, scores_disparity, memo = SequencesClustersEvaluation.evaluate_cluster(
+                    cluster=evaluated, eval_homogeneity=eval_homogeneity, memoization=memo, cache=cache,
+                    eval_disparity=eval_disparity, deduplicate=deduplicate,
+                    eval_disparity_if_homogeneity_is_zero=eval_disparity_if_homogeneity_is_zero,
+                    precomputed=parallel_results.get(cluster_index, None))
+            # end if
             if scores_homogeneity is None and scores_disparity is None:
                 continue
             # end if
@@ -635,19 +1698,32 @@ class SequencesClustersEvaluation(object):
         if size1_clusters == model_size:
             warnings.warn("All the clusters in the model have a size of 1.")
         # end if
-        for _, v in model_scores.items():
+        for key in [key_h, key_d]:
+            v = model_scores[key]
             if v is None:
                 continue
+            if clusters_count == 0:
+                # The first cluster exceeds the threshold, no cluster is evaluated
+                model_scores[key] = None
+                continue
+            # end if
             for idx in range(len(v[0])):
-                v[0][idx] /= model_size
+                v[0][idx] /= clusters_count
             # end for
         # end for
+        if cache is not None:
+            cache.flush()
+            model_scores[key_cache] = cache.get_statistics()
+        # end if
 
-        return model_scores, key_h, key_d, memoization
+        return model_scores, key_h, key_d, SequencesClustersEvaluation._return_memoization(memo, memoization)
     # end evaluate_model
 
     @staticmethod
-    def evaluate_model_using_weak_disparity(model: list, memoization: dict = None) -> tuple:
+    @Instrumentation.instrument("evaluate_model_using_weak_disparity", items="model")
+    def evaluate_model_using_weak_disparity(
+            model: list, memoization=None, cache: SequencesScoreCache = None, deduplicate: bool = False,
+            n_jobs: int = 1, executor=None) -> tuple:
         if isinstance(model, list) is False:
             raise TypeError("model should be of type list.")
         # end if
@@ -662,28 +1738,35 @@ class SequencesClustersEvaluation(object):
             sequence_copy = from_sequence.copy()
             if cos is False:
                 sequence_copy = sorted(from_sequence)
+            # Holds the values already added
+            seen = set()
+            # Holds the number of back to back occurrences of the last value added
+            run_count = 0
             # Go through the content of the from_sequence
             for fs_item in sequence_copy:
+                is_repeated = bool(patterns) and fs_item == patterns[-1]
                 if cio is False:
                     # Back to back values are not considered, therefore
                     # move on if the current value is the same as the last one.
-                    if patterns and fs_item == patterns[-1]:
+                    if is_repeated is True:
                         continue
                 # end if
-                if cdv is False and fs_item in patterns:
-                    if cio is True:
-                        if len(patterns) >= immediate_occurrence_max:
-                            compare_to = [fs_item] * immediate_occurrence_max
-                            if patterns[-immediate_occurrence_max:] == compare_to:
+                if cdv is False:
+                    item_key = SequencesEncoder.to_hashable(fs_item)
+                    if item_key in seen:
+                        if cio is True:
+                            if is_repeated is True and run_count >= immediate_occurrence_max:
                                 continue
                             # end if
+                        else:
+                            continue
                         # end if
-                    else:
-                        continue
                     # end if
+                    seen.add(item_key)
                 # end if
                 # Add the item
                 patterns.append(fs_item)
+                run_count = run_count + 1 if is_repeated is True else 1
             # end for from_sequence
             return patterns
         # end create_pattern
@@ -691,6 +1774,9 @@ class SequencesClustersEvaluation(object):
         # Rebuild the model with the disparity setting
         new_model = list()
         for cluster in model:
+            if isinstance(cluster, SequencesEncoder) is True:
+                cluster = cluster.to_list()
+            # end if
             if isinstance(cluster, list) is False:
                 raise TypeError("The items in the model should be of type list.")
             # end if
@@ -706,7 +1792,8 @@ class SequencesClustersEvaluation(object):
         # Evaluate the model
         eval_result = SequencesClustersEvaluation.evaluate_model(
             model=new_model, eval_homogeneity=True, eval_disparity=True,
-            eval_disparity_if_homogeneity_is_zero=False, memoization=memoization)
+            eval_disparity_if_homogeneity_is_zero=False, memoization=memoization, cache=cache,
+            deduplicate=deduplicate, n_jobs=n_jobs, executor=executor)
         return eval_result
     # end evaluate_model_using_weak_disparity
 
@@ -843,6 +1930,160 @@ class SequencesClustersEvaluation(object):
             [["e", 0], ["r", 0]], [["e", 0], ["e", 0], ["r", 0], ["e", 0]])
     # end example_disparity_evaluation
 
+    @staticmethod
+    def example_disparity_evaluation_equivalence(trials: int = 2000, seed: int = 0):
+        """
+        Compare disparity_evaluation and find_largest_subsequence_index to the
+        previous implementations, which copied and sliced the sequences at each
+        step, on random sequences.
+        """
+        def find_largest_subsequence_index_previous(subsequence: list, sequence: list) -> tuple:
+            subsequence_size = len(subsequence)
+            if subsequence_size <= 1 or subsequence[0] not in sequence:
+                return None
+            # end if
+            if subsequence == sequence:
+                return [(0, subsequence_size)], 0, subsequence_size
+            # end if
+            search_index, best_index, best_number_items = 0, None, None
+            sequence_size = len(sequence)
+            while subsequence[0] in sequence[search_index:]:
+                index = sequence[search_index:].index(subsequence[0]) + search_index
+                seq_size = sequence_size - index
+                items_found = 1
+                if subsequence == sequence[index:]:
+                    items_found = subsequence_size
+                else:
+                    for i in range(1, subsequence_size):
+                        if i >= seq_size or subsequence[i] != sequence[i + index]:
+                            break
+                        # end if
+                        items_found += 1
+                    # end for
+                # end if
+                if best_index is None or best_number_items < items_found:
+                    best_index, best_number_items = index, items_found
+                # end if
+                if best_number_items >= seq_size:
+                    break
+                # end if
+                search_index = index + 1
+            # end while
+            return best_index, best_number_items
+        # end find_largest_subsequence_index_previous
+
+        def disparity_evaluation_previous(sequence1: list, sequence2: list):
+            if sequence1 == sequence2:
+                return 0, list()
+            # end if
+            seq_short, seq_long = sequence1.copy(), sequence2.copy()
+            if len(sequence2) < len(sequence1):
+                seq_long = seq_short
+                seq_short = sequence2.copy()
+            # end if
+            missing, subsequences_shifted = list(), list()
+            while seq_short:
+                if seq_short == seq_long:
+                    seq_short, seq_long = list(), list()
+                    break
+                # end if
+                do_search = False
+                if seq_short[0] == seq_long[0]:
+                    if len(seq_short) == 1:
+                        seq_long = seq_long[1:]
+                    elif len(seq_long) > 1 and seq_short[0] in seq_long[1:]:
+                        do_search = True
+                    else:
+                        seq_long = seq_long[1:]
+                    # end if
+                elif seq_short[0] in seq_long:
+                    if len(seq_short) == 1:
+                        seq_long.remove(seq_short[0])
+                        subsequences_shifted.append(seq_short[0])
+                        seq_short = list()
+                    else:
+                        do_search = True
+                    # end if
+                else:
+                    missing.append(seq_short[0])
+                # end if
+                if do_search is True:
+                    best_index, subsequence_size = find_largest_subsequence_index_previous(seq_short, seq_long)
+                    if best_index > 0:
+                        subsequences_shifted.append(seq_short[:subsequence_size])
+                    # end if
+                    seq_short = seq_short[subsequence_size:]
+                    seq_long = seq_long[:best_index] + seq_long[best_index + subsequence_size:]
+                else:
+                    seq_short = seq_short[1:]
+                # end if
+            # end while
+            for item in seq_short + seq_long:
+                if item not in missing:
+                    missing.append(item)
+                # end if
+            # end for
+            return len(missing + subsequences_shifted), missing
+        # end disparity_evaluation_previous
+
+        generator = random.Random(seed)
+        for _ in range(trials):
+            alphabet = [[f"action{i}", 0] for i in range(generator.randint(1, 6))]
+            sequence1 = [generator.choice(alphabet) for _ in range(generator.randint(0, 25))]
+            sequence2 = [generator.choice(alphabet) for _ in range(generator.randint(0, 25))]
+            if generator.random() < 0.3:
+                # Shift a few items of sequence1
+                sequence2 = sequence1.copy()
+                for _ in range(generator.randint(1, 3)):
+                    if sequence2:
+                        sequence2.insert(generator.randrange(len(sequence2)),
+                                         sequence2.pop(generator.randrange(len(sequence2))))
+                    # end if
+                # end for
+            # end if
+            expected = disparity_evaluation_previous(sequence1, sequence2)
+            result = SequencesClustersEvaluation.disparity_evaluation(sequence1, sequence2)
+            assert result == expected, f"Result did not match for {sequence1} and {sequence2}."
+            if sequence1 and sequence2:
+                expected = find_largest_subsequence_index_previous(sequence1, sequence2)
+                result = SequencesClustersEvaluation.find_largest_subsequence_index(sequence1, sequence2)
+                assert result == expected, f"Index did not match for {sequence1} and {sequence2}."
+            # end if
+        # end for
+    # end example_disparity_evaluation_equivalence
+
+    @staticmethod
+    def example_kernels_equivalence(trials: int = 2000, seed: int = 0) -> bool:
+        """
+        Compare the scores of SequencesKernels with the scores of the Python code on
+        random sequences of int. The kernels are compiled when numba is installed.
+
+        Returns
+        -------
+        bool (True if the kernels were compiled.)
+        """
+        generator = random.Random(seed)
+        for _ in range(trials):
+            alphabet_size = generator.randint(1, 8)
+            sequence1 = [generator.randrange(alphabet_size) for _ in range(generator.randint(1, 25))]
+            sequence2 = [generator.randrange(alphabet_size) for _ in range(generator.randint(1, 25))]
+            if generator.random() < 0.3:
+                # Shift a few items of sequence1
+                sequence2 = sequence1.copy()
+                for _ in range(generator.randint(1, 3)):
+                    sequence2.insert(generator.randrange(len(sequence2)),
+                                     sequence2.pop(generator.randrange(len(sequence2))))
+                # end for
+            # end if
+            message = f"Result did not match for {sequence1} and {sequence2}."
+            assert SequencesKernels.homogeneity_score(sequence1, sequence2) == \
+                SequencesClustersEvaluation.homogeneity_evaluation(sequence1, sequence2)[0], message
+            assert SequencesKernels.disparity_score(sequence1, sequence2) == \
+                SequencesClustersEvaluation.disparity_evaluation(sequence1, sequence2)[0], message
+        # end for
+        return SequencesKernels.is_compiled()
+    # end example_kernels_equivalence
+
     @staticmethod
     def example_predecessors_evaluation():
         sequence1 = [['unlock', 0], ['scan', 0], ['scan', 0], ['scan', 0],
@@ -873,6 +2114,58 @@ class SequencesClustersEvaluation(object):
         return result
     # end example_evaluate_cluster
 
+    @staticmethod
+    def example_evaluate_cluster_threshold():
+        cluster = SequencesClustersEvaluation.example_sequences()
+        status = dict()
+        result = SequencesClustersEvaluation.evaluate_cluster(cluster, max_homogeneity=0, status=status)
+        assert result[:2] == (None, None) and status["exceeded"] is True, \
+            "The cluster is not pure, it should not be evaluated."
+        pure = [cluster[0], list(cluster[0])]
+        result = SequencesClustersEvaluation.evaluate_cluster(pure, max_homogeneity=0, status=status)
+        assert status["exceeded"] is False and result[:2] == SequencesClustersEvaluation.evaluate_cluster(pure)[:2], \
+            "The pure cluster should be evaluated."
+        return result
+    # end example_evaluate_cluster_threshold
+
+    @staticmethod
+    def example_evaluate_cluster_deduplicated():
+        # The cluster holds many copies of the same sequences
+        cluster = SequencesClustersEvaluation.example_sequences() * 3
+        result = SequencesClustersEvaluation.evaluate_cluster(cluster, deduplicate=True)
+        expected = SequencesClustersEvaluation.evaluate_cluster(cluster)
+        assert result[:2] == expected[:2], "The deduplicated scores should be the same."
+        return result
+    # end example_evaluate_cluster_deduplicated
+
+    @staticmethod
+    def example_evaluate_cluster_sampled():
+        cluster = SequencesClustersEvaluation.example_sequences() * 3
+        estimates = SequencesClustersEvaluation.evaluate_cluster_sampled(cluster, sample_size=10, seed=0)
+        assert estimates[0]["pairs_scored"] <= 10, "At most sample_size pairs should be evaluated."
+        assert estimates[0]["interval"] is None, "The interval needs MIN_SAMPLED_ROWS rows."
+        large = [[str(index % 7), str(index % 5)] for index in range(500)]
+        for stratified in [False, True]:
+            result = SequencesClustersEvaluation.evaluate_cluster_sampled(
+                large, sample_size=1000, seed=0, stratified=stratified, eval_disparity=False)
+            assert result[0]["pairs_scored"] <= 1000, "At most sample_size pairs should be evaluated."
+            assert result[0]["rows_scored"] >= SequencesClustersEvaluation.MIN_SAMPLED_ROWS \
+                and result[0]["interval"] is not None, "The interval should be computed over the rows."
+        # end for
+        # When the sample covers all the pairs, the scores are the ones of evaluate_cluster
+        expected = SequencesClustersEvaluation.evaluate_cluster(cluster)
+        for stratified in [False, True]:
+            result = SequencesClustersEvaluation.evaluate_cluster_sampled(
+                cluster, sample_size=len(cluster) ** 2, seed=0, stratified=stratified)
+            for scores, expected_scores in zip(result[:2], expected[:2]):
+                assert (scores is None and expected_scores is None) or \
+                    [scores["min"], scores["max"], scores["average"]] == expected_scores, \
+                    "The scores of all the rows should be the same as evaluate_cluster."
+            # end for
+        # end for
+        return estimates
+    # end example_evaluate_cluster_sampled
+
     @staticmethod
     def example_evaluate_model():
         model = [SequencesClustersEvaluation.example_sequences()] * 2
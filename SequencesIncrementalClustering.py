@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+from SequencesStringComparisonClustering import SequencesStringComparisonClustering
+
+
+class SequencesIncrementalClustering(object):
+    """
+    Incremental version of SequencesStringComparisonClustering.create_clusters.
+    The sequences are added one at a time (or from an iterator) and only the
+    cluster keys, the pattern of each cluster and the ids (or only the count)
+    of the sequences in the clusters are kept in memory. The sequences
+    themselves are not stored.
+
+    The cluster numbers are identical to the ones returned by create_clusters
+    when the sequences are added in the same order.
+    """
+
+    def __init__(self, subsequence_size: int = 1, consider_order_of_sequence: bool = True,
+                 consider_immediate_occurrence: bool = True, consider_duplicate_values: bool = True,
+                 immediate_occurrence_max: int = 2, keep_member_ids: bool = True):
+        """
+        Parameters
+        ----------
+        subsequence_size, consider_order_of_sequence, consider_immediate_occurrence,
+        consider_duplicate_values, immediate_occurrence_max :
+            See SequencesStringComparisonClustering.create_pattern.
+
+        keep_member_ids : bool, optional
+            When True, the ids of the sequences are kept for each cluster,
+            otherwise only the number of sequences is kept.
+            The default is True.
+        """
+        if not subsequence_size:
+            subsequence_size = 1
+        # end if
+        _ = SequencesStringComparisonClustering._helper_validate_pattern_inputs(
+                subsequence_size=subsequence_size,
+                consider_order_of_sequence=consider_order_of_sequence,
+                consider_immediate_occurrence=consider_immediate_occurrence,
+                consider_duplicate_values=consider_duplicate_values,
+                immediate_occurrence_max=immediate_occurrence_max
+        )
+        if isinstance(keep_member_ids, bool) is False:
+            raise TypeError("keep_member_ids should be of type bool.")
+        # end if
+        self.subsequence_size = subsequence_size
+        self.consider_order_of_sequence = consider_order_of_sequence
+        self.consider_immediate_occurrence = consider_immediate_occurrence
+        self.consider_duplicate_values = consider_duplicate_values
+        self.immediate_occurrence_max = max(immediate_occurrence_max, 2)
+        self.keep_member_ids = keep_member_ids
+        self._keys = dict()  # Holds the cluster number of each pattern key
+        self._patterns = list()  # Holds the pattern of each cluster
+        self._counts = list()  # Holds the number of sequences in each cluster
+        self._members = list()  # Holds the ids of the sequences in each cluster
+        self._next_id = 0
+    # end __init__
+
+    def __len__(self):
+        return len(self._patterns)
+    # end __len__
+
+    @property
+    def sequences_count(self) -> int:
+        """ The number of sequences added. """
+        return sum(self._counts)
+    # end sequences_count
+
+    def add(self, sequence: list, sequence_id=None) -> tuple:
+        """
+        Add a sequence to its cluster.
+
+        Parameters
+        ----------
+        sequence : list
+            The sequence to add.
+
+        sequence_id : optional
+            The id of the sequence. When None, the number of sequences
+            added so far is used.
+
+        Returns
+        -------
+        tuple (sequence_id, cluster_number)
+        """
+        if sequence_id is None:
+            sequence_id = self._next_id
+        # end if
+        self._next_id += 1
+        _, subsequences = SequencesStringComparisonClustering.create_pattern(
+            from_sequence=sequence, subsequence_size=self.subsequence_size,
+            consider_order_of_sequence=self.consider_order_of_sequence,
+            consider_immediate_occurrence=self.consider_immediate_occurrence,
+            consider_duplicate_values=self.consider_duplicate_values,
+            immediate_occurrence_max=self.immediate_occurrence_max
+        )
+        key = SequencesStringComparisonClustering.create_pattern_key(
+            pattern=subsequences, consider_order_of_sequence=self.consider_order_of_sequence)
+        cluster_number = self._keys.get(key, None) if key is not None else None
+        if cluster_number is None:
+            cluster_number = len(self._patterns)
+            self._patterns.append(subsequences)
+            self._counts.append(0)
+            self._members.append(list() if self.keep_member_ids is True else None)
+            if key is not None:
+                self._keys[key] = cluster_number
+            # end if
+        # end if
+        self._counts[cluster_number] += 1
+        if self.keep_member_ids is True:
+            self._members[cluster_number].append(sequence_id)
+        # end if
+        return sequence_id, cluster_number
+    # end add
+
+    def add_many(self, sequences, sequence_ids=None) -> list:
+        """
+        Add the sequences of an iterable (list, generator, ...) to their clusters.
+        The sequences are read one at a time, therefore a generator is not held
+        in memory.
+
+        Parameters
+        ----------
+        sequences : iterable
+            The sequences to add.
+
+        sequence_ids : iterable, optional
+            The ids of the sequences. When None, the ids are generated.
+
+        Returns
+        -------
+        list of tuple (sequence_id, cluster_number)
+        """
+        if sequence_ids is None:
+            return [self.add(sequence) for sequence in sequences]
+        # end if
+        return [self.add(sequence, sequence_id=sequence_id) for sequence, sequence_id in zip(sequences, sequence_ids)]
+    # end add_many
+
+    def snapshot(self) -> dict:
+        """
+        Return the current state of the clusters.
+
+        Returns
+        -------
+        dict
+            {cluster_number: (pattern, count, member ids)}.
+            The member ids are None when keep_member_ids is False.
+        """
+        snapshot = dict()
+        for cluster_number, pattern in enumerate(self._patterns):
+            members = self._members[cluster_number]
+            snapshot[cluster_number] = (
+                pattern, self._counts[cluster_number], members.copy() if members is not None else None)
+        # end for
+        return snapshot
+    # end snapshot
+
+    @staticmethod
+    def example_add_many():
+        sequences = ([["a", 0], ["b", 0]] if i % 3 else [["c", 0]] for i in range(10))
+        clustering = SequencesIncrementalClustering()
+        assignments = clustering.add_many(sequences)
+        assert assignments[0] == (0, 0) and assignments[1] == (1, 1), "Unexpected cluster numbers."
+        snapshot = clustering.snapshot()
+        assert snapshot[0][1] == 4 and snapshot[1][1] == 6, "Unexpected cluster sizes."
+        return snapshot
+    # end example_add_many
+
+# end SequencesIncrementalClustering
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+import os
+try:
+    import numpy
+except ImportError:  # the kernels then work on lists of int
+    numpy = None
+try:
+    import numba
+except ImportError:  # the kernels are then run by the Python interpreter
+    numba = None
+
+
+# Holds True when the compiled kernels are written to the disk (__pycache__ or NUMBA_CACHE_DIR)
+# so that the next processes, e.g. the processes of evaluate_model with n_jobs, load them instead
+# of compiling them again. Set SEQUENCES_KERNELS_CACHE=0 to disable it.
+CACHE = os.environ.get("SEQUENCES_KERNELS_CACHE", "1") == "1"
+
+
+def _jit(function):
+    """ Compile the function with numba when it is available. """
+    if numba is None or numpy is None:
+        return function
+    # end if
+    if CACHE is True:
+        try:
+            return numba.njit(cache=True)(function)
+        except RuntimeError:  # No directory to write the cache
+            pass
+        # end try
+    # end if
+    return numba.njit(cache=False)(function)
+# end _jit
+
+
+@_jit
+def _are_equal(sequence1, sequence2) -> bool:
+    if len(sequence1) != len(sequence2):
+        return False
+    # end if
+    for index in range(len(sequence1)):
+        if sequence1[index] != sequence2[index]:
+            return False
+        # end if
+    # end for
+    return True
+# end _are_equal
+
+
+if numpy is None:
+    def _argsort(values) -> list:
+        """ Return the indexes of the values sorted by value, the equal values are kept in order. """
+        return sorted(range(len(values)), key=values.__getitem__)
+    # end _argsort
+else:
+    @_jit
+    def _argsort(values):
+        """ Return the indexes of the values sorted by value, the equal values are kept in order. """
+        return numpy.argsort(values, kind="stable")
+    # end _argsort
+# end if
+
+
+@_jit
+def _homogeneity_kernel(sequence1, sequence2) -> int:
+    """ Return the number of distinct items that are not in both sequences. """
+    sorted1, sorted2 = sorted(sequence1), sorted(sequence2)
+    size1, size2 = len(sorted1), len(sorted2)
+    score, index1, index2 = 0, 0, 0
+    while index1 < size1 or index2 < size2:
+        if index2 >= size2 or (index1 < size1 and sorted1[index1] < sorted2[index2]):
+            value = sorted1[index1]
+            score += 1
+        elif index1 >= size1 or sorted2[index2] < sorted1[index1]:
+            value = sorted2[index2]
+            score += 1
+        else:
+            value = sorted1[index1]
+        # end if
+        # Skip the copies of the value
+        while index1 < size1 and sorted1[index1] == value:
+            index1 += 1
+        # end while
+        while index2 < size2 and sorted2[index2] == value:
+            index2 += 1
+        # end while
+    # end while
+    return score
+# end _homogeneity_kernel
+
+
+@_jit
+def _find_group(sorted_values, value) -> int:
+    """ Return the index of the first occurrence of value in sorted_values or -1. """
+    low, high = 0, len(sorted_values)
+    while low < high:
+        middle = (low + high) // 2
+        if sorted_values[middle] < value:
+            low = middle + 1
+        else:
+            high = middle
+        # end if
+    # end while
+    if low < len(sorted_values) and sorted_values[low] == value:
+        return low
+    # end if
+    return -1
+# end _find_group
+
+
+@_jit
+def _disparity_kernel(sequence1, sequence2) -> int:
+    """
+    Return the disparity score of the sequences,
+    see SequencesClustersEvaluation.disparity_evaluation_from_profiles.
+    """
+    if _are_equal(sequence1, sequence2) is True:
+        return 0
+    # end if
+    short_keys, long_keys = sequence1, sequence2
+    if len(sequence2) < len(sequence1):
+        short_keys, long_keys = sequence2, sequence1
+    # end if
+    short_size, long_size = len(short_keys), len(long_keys)
+    # Holds the linked list of the remaining indexes of the longest sequence
+    next_index = [index + 1 for index in range(long_size)]
+    previous_index = [index - 1 for index in range(long_size)]
+    is_removed = [False] * long_size
+    head, long_remaining = 0, long_size
+    # The indexes of the longest sequence sorted by item (then by index) replace the
+    # positions of each item, a group is the range of the indexes of an item.
+    sorted_indexes = _argsort(long_keys)
+    sorted_values = [long_keys[index] for index in sorted_indexes]
+    group_of = [0] * long_size  # Holds the group of each index of the longest sequence
+    group_end = [0] * long_size  # Holds the end of each group (at the start of the group)
+    first_position = [0] * long_size  # Holds the first remaining position of each group
+    counts = [0] * long_size  # Holds the number of remaining items of each group
+    start = 0
+    while start < long_size:
+        end = start
+        while end < long_size and sorted_values[end] == sorted_values[start]:
+            group_of[sorted_indexes[end]] = start
+            end += 1
+        # end while
+        group_end[start], first_position[start], counts[start] = end, start, end - start
+        start = end
+    # end while
+    missing_count, shifted_count = 0, 0
+    missing_keys = set()
+    cursor = 0
+    while cursor < short_size:
+        # Compare the remaining items of the sequences
+        if short_size - cursor == long_remaining:
+            index, is_equal = head, True
+            for short_index in range(cursor, short_size):
+                if short_keys[short_index] != long_keys[index]:
+                    is_equal = False
+                    break
+                # end if
+                index = next_index[index]
+            # end for
+            if is_equal is True:
+                cursor, long_remaining = short_size, 0
+                break
+            # end if
+        # end if
+        current = short_keys[cursor]
+        short_remaining = short_size - cursor
+        group = _find_group(sorted_values, current)
+        # Holds the index of the item of the longest sequence to remove (-1: none)
+        to_remove = -1
+        do_search = False
+        if current == long_keys[head]:
+            if short_remaining == 1:
+                to_remove = head
+            elif long_remaining > 1 and counts[group] > 1:
+                # See if there is a longer subsequence
+                do_search = True
+            else:
+                to_remove = head
+            # end if
+            cursor += 0 if do_search is True else 1
+        elif group >= 0 and counts[group] > 0:
+            if short_remaining == 1:
+                position = first_position[group]
+                while is_removed[sorted_indexes[position]] is True:
+                    position += 1
+                # end while
+                first_position[group] = position
+                to_remove = sorted_indexes[position]
+                shifted_count += 1
+                cursor = short_size
+            else:
+                do_search = True
+            # end if
+        else:
+            missing_count += 1
+            missing_keys.add(current)
+            cursor += 1
+        # end if
+        # Holds the indexes to remove and the number of indexes
+        best_index, subsequence_size = to_remove, 1 if to_remove >= 0 else 0
+        if do_search is True:
+            position = first_position[group]
+            while position < group_end[group] and is_removed[sorted_indexes[position]] is True:
+                position += 1
+            # end while
+            first_position[group] = position
+            best_index, subsequence_size = -1, 0
+            while position < group_end[group]:
+                index = sorted_indexes[position]
+                position += 1
+                if is_removed[index] is True:
+                    continue
+                # end if
+                items_found, long_index = 0, index
+                while (cursor + items_found < short_size and long_index < long_size
+                       and short_keys[cursor + items_found] == long_keys[long_index]):
+                    items_found += 1
+                    long_index = next_index[long_index]
+                # end while
+                if best_index < 0 or subsequence_size < items_found:
+                    best_index, subsequence_size = index, items_found
+                # end if
+                if subsequence_size == short_remaining:
+                    break
+                # end if
+            # end while
+            if best_index != head:
+                shifted_count += 1
+            # end if
+            cursor += subsequence_size
+        # end if
+        for _ in range(subsequence_size):
+            # Remove the item at best_index from the longest sequence
+            following = next_index[best_index]
+            is_removed[best_index] = True
+            long_remaining -= 1
+            counts[group_of[best_index]] -= 1
+            before = previous_index[best_index]
+            if before >= 0:
+                next_index[before] = following
+            else:
+                head = following
+            # end if
+            if following < long_size:
+                previous_index[following] = before
+            # end if
+            best_index = following
+        # end for
+    # end while
+    for short_index in range(cursor, short_size):
+        if short_keys[short_index] not in missing_keys:
+            missing_count += 1
+            missing_keys.add(short_keys[short_index])
+        # end if
+    # end for
+    index = head
+    while long_remaining and index < long_size:
+        if long_keys[index] not in missing_keys:
+            missing_count += 1
+            missing_keys.add(long_keys[index])
+        # end if
+        index = next_index[index]
+    # end while
+    return missing_count + shifted_count
+# end _disparity_kernel
+
+
+class SequencesKernels(object):
+    """
+    Kernels computing the scores of SequencesClustersEvaluation on sequences
+    of int (e.g. the sequences of SequencesEncoder). The kernels are compiled
+    with numba when it is installed, otherwise they are run by the Python
+    interpreter and SequencesClustersEvaluation uses its own code instead
+    (see is_compiled). The scores are the same as the ones of
+    SequencesClustersEvaluation (see SequencesClustersEvaluation.example_kernels_equivalence).
+    The kernels are used for the scores of the pairs of sequences of
+    evaluate_cluster and evaluate_model (see evaluate_one_to_many). The public
+    functions homogeneity_evaluation, disparity_evaluation, ... also return the
+    items found (missing items, shifted items), they use the Python code.
+    """
+    # The kernels, the sequences should already be converted (see to_array)
+    homogeneity_kernel = staticmethod(_homogeneity_kernel)
+    disparity_kernel = staticmethod(_disparity_kernel)
+
+    @staticmethod
+    def is_compiled() -> bool:
+        """ Return True if the kernels are compiled with numba. """
+        return numba is not None and numpy is not None
+    # end is_compiled
+
+    @staticmethod
+    def to_array(sequence):
+        """ Convert a sequence of int (list, array, memoryview) to the type used by the kernels. """
+        if numpy is None:
+            return list(sequence)
+        # end if
+        return numpy.asarray(sequence, dtype=numpy.int64)
+    # end to_array
+
+    @staticmethod
+    def homogeneity_score(sequence1, sequence2) -> int:
+        """ See SequencesClustersEvaluation.homogeneity_evaluation. """
+        return int(SequencesKernels.homogeneity_kernel(
+            SequencesKernels.to_array(sequence1), SequencesKernels.to_array(sequence2)))
+    # end homogeneity_score
+
+    @staticmethod
+    def disparity_score(sequence1, sequence2) -> int:
+        """ See SequencesClustersEvaluation.disparity_evaluation. """
+        return int(SequencesKernels.disparity_kernel(
+            SequencesKernels.to_array(sequence1), SequencesKernels.to_array(sequence2)))
+    # end disparity_score
+
+# end SequencesKernels
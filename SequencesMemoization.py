@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+from collections import OrderedDict
+from SequencesEncoder import SequencesEncoder
+
+
+class SequencesMemoization(object):
+    """
+    Memoization of the scores of pairs of sequences used by SequencesClustersEvaluation.
+    Each distinct sequence is given an id using a hash map from the key of
+    the sequence to the id, and the scores are stored by pair of ids (tuple of int).
+    The number of pairs stored can be capped, in which case the least recently
+    used pairs are evicted. A sequence is then forgotten (its id and its
+    key are removed) when its last pair is evicted, and it is given a
+    new id if it is seen again. The ids are never reused.
+    """
+    # Holds the keys of the dictionary format used before SequencesMemoization
+    KEY_UNIQUE_SEQUENCES = "unique_sequences"
+
+    def __init__(self, max_size: int = None):
+        """
+        Parameters
+        ----------
+        max_size : int, optional
+            The maximum number of pairs of sequences stored.
+            The default is None (no limit).
+        """
+        if max_size is not None and (isinstance(max_size, int) is False or max_size <= 0):
+            raise TypeError("max_size should be a positive int or None.")
+        # end if
+        self.max_size = max_size
+        self._ids = dict()  # Holds the id of each key
+        self._keys = dict()  # Holds the key of each id (the key of _ids, not a copy)
+        self.sequences = dict()  # Holds the sequence of each id
+        self._next_id = 0
+        # Holds the number of pairs stored for each id, only used when max_size is set
+        self._references = dict()
+        self._scores = OrderedDict()  # Holds the scores of each pair of ids
+        self.hits, self.misses, self.evictions = 0, 0, 0
+    # end __init__
+
+    def __len__(self):
+        return len(self._scores)
+    # end __len__
+
+    def __contains__(self, pair: tuple):
+        return pair in self._scores
+    # end __contains__
+
+    @staticmethod
+    def key(sequence: list) -> tuple:
+        """
+        Return the hashable value used to identify the sequence: a copy of the
+        sequence as nested tuples (see SequencesEncoder.to_hashable), not a digest,
+        therefore two sequences have the same id only if they are equal.
+        """
+        return SequencesEncoder.to_hashable(sequence)
+    # end key
+
+    def get_id(self, sequence: list, key=None) -> int:
+        """
+        Return the id of the sequence, a new id is created if needed.
+        The key of the sequence can be given when already known.
+        """
+        if key is None:
+            key = self.key(sequence)
+        # end if
+        sequence_id = self._ids.get(key, None)
+        if sequence_id is None:
+            sequence_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = sequence_id
+            self._keys[sequence_id] = key
+            self.sequences[sequence_id] = sequence
+        # end if
+        return sequence_id
+    # end get_id
+
+    def find_id(self, sequence: list, key=None):
+        """ Return the id of the sequence or None if the sequence is not stored, no id is created. """
+        if key is None:
+            key = self.key(sequence)
+        # end if
+        return self._ids.get(key, None)
+    # end find_id
+
+    def _release(self, sequence_id: int):
+        """ Decrease the number of pairs of the sequence, the sequence is forgotten when there is none. """
+        references = self._references.get(sequence_id, None)
+        if references is None:
+            return
+        # end if
+        if references > 1:
+            self._references[sequence_id] = references - 1
+            return
+        # end if
+        del self._references[sequence_id]
+        del self._ids[self._keys.pop(sequence_id)]
+        del self.sequences[sequence_id]
+    # end _release
+
+    def get(self, id1: int, id2: int, symmetric: tuple = ()):
+        """
+        Return the scores of the pair of sequences.
+
+        Parameters
+        ----------
+        symmetric : tuple, optional
+            The indexes of the scores that do not depend on the order of the
+            pair (e.g. (0,) for the homogeneity). When the pair is not stored,
+            these scores are read from the reversed pair (id2, id1) and the
+            other scores are None. The default is () (ordered pair only).
+
+        Returns
+        -------
+        list [homogeneity, disparity] or None if the pair is not stored.
+        """
+        pair = (id1, id2)
+        scores = self._scores.get(pair, None)
+        if scores is None and symmetric:
+            pair = (id2, id1)
+            reversed_scores = self._scores.get(pair, None)
+            if reversed_scores is not None:
+                scores = [score if index in symmetric else None for index, score in enumerate(reversed_scores)]
+            # end if
+        # end if
+        if scores is None:
+            self.misses += 1
+            return None
+        # end if
+        self.hits += 1
+        self._scores.move_to_end(pair)
+        return scores
+    # end get
+
+    def set(self, id1: int, id2: int, scores: list):
+        """ Store the scores of the pair of sequences. """
+        pair = (id1, id2)
+        if self.max_size is not None and pair not in self._scores:
+            for sequence_id in pair:
+                if sequence_id in self.sequences:
+                    self._references[sequence_id] = self._references.get(sequence_id, 0) + 1
+                # end if
+            # end for
+        # end if
+        self._scores[pair] = scores
+        self._scores.move_to_end(pair)
+        if self.max_size is not None:
+            while len(self._scores) > self.max_size:
+                evicted, _ = self._scores.popitem(last=False)
+                self.evictions += 1
+                self._release(evicted[0])
+                self._release(evicted[1])
+            # end while
+        # end if
+    # end set
+
+    def update(self, other):
+        """
+        Add the pairs of sequences stored in other (SequencesMemoization).
+        The ids of other are converted using the keys of the sequences.
+        The scores already stored are kept, only their missing scores are set.
+        """
+        if isinstance(other, SequencesMemoization) is False:
+            raise TypeError("other should be of type SequencesMemoization.")
+        # end if
+        ids = {other_id: self.get_id(sequence, key=other._keys[other_id])
+               for other_id, sequence in other.sequences.items()}
+        for (id1, id2), scores in other._scores.items():
+            if id1 not in ids or id2 not in ids:
+                continue
+            # end if
+            pair = (ids[id1], ids[id2])
+            stored = self._scores.get(pair, None)
+            if stored is not None:
+                scores = [score if score is not None else other_score for score, other_score in zip(stored, scores)]
+            # end if
+            self.set(pair[0], pair[1], scores)
+        # end for
+    # end update
+
+    def extract(self, sequences: list):
+        """
+        Return a new SequencesMemoization (without limit) holding the pairs stored
+        for the given sequences, i.e. the pairs whose two sequences are in sequences.
+        The hits, misses and order of the pairs stored are not changed.
+        """
+        ids = set()
+        for sequence in sequences:
+            sequence_id = self.find_id(sequence)
+            if sequence_id is not None:
+                ids.add(sequence_id)
+            # end if
+        # end for
+        memo = SequencesMemoization()
+        for (id1, id2), scores in self._scores.items():
+            if id1 in ids and id2 in ids:
+                memo.set(memo.get_id(self.sequences[id1], key=self._keys[id1]),
+                         memo.get_id(self.sequences[id2], key=self._keys[id2]), list(scores))
+            # end if
+        # end for
+        return memo
+    # end extract
+
+    def get_statistics(self) -> dict:
+        """ Return the number of hits, misses and evictions and the size of the memoization. """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._scores), "max_size": self.max_size, "sequences": len(self.sequences)}
+    # end get_statistics
+
+    @staticmethod
+    def from_dict(memoization: dict, max_size: int = None):
+        """
+        Create a SequencesMemoization from the dictionary format
+        {"unique_sequences": [sequences], "id1->id2": [homogeneity, disparity]}.
+        """
+        if isinstance(memoization, dict) is False:
+            raise TypeError("memoization should be of type dict.")
+        # end if
+        memo = SequencesMemoization(max_size=max_size)
+        for sequence in memoization.get(SequencesMemoization.KEY_UNIQUE_SEQUENCES, list()):
+            memo.get_id(sequence)
+        # end for
+        for key, scores in memoization.items():
+            if key == SequencesMemoization.KEY_UNIQUE_SEQUENCES:
+                continue
+            # end if
+            id1, id2 = key.split("->")
+            memo.set(int(id1), int(id2), scores)
+        # end for
+        return memo
+    # end from_dict
+
+    def to_dict(self) -> dict:
+        """
+        Return the content in the dictionary format (see from_dict).
+        The ids are renumbered when sequences were forgotten (see max_size).
+        """
+        if len(self.sequences) == self._next_id:
+            memoization = {f"{id1}->{id2}": scores for (id1, id2), scores in self._scores.items()}
+        else:
+            ids = {sequence_id: number for number, sequence_id in enumerate(self.sequences)}
+            memoization = {f"{ids[id1]}->{ids[id2]}": scores for (id1, id2), scores in self._scores.items()
+                           if id1 in ids and id2 in ids}
+        # end if
+        memoization[SequencesMemoization.KEY_UNIQUE_SEQUENCES] = list(self.sequences.values())
+        return memoization
+    # end to_dict
+
+# end SequencesMemoization
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+"""
+import hashlib
+import json
+import sqlite3
+
+
+class SequencesScoreCache(object):
+    """
+    Persistent cache of the scores of pairs of sequences stored in a local SQLite file.
+    The scores are stored by content hash of the two sequences and by evaluation
+    variant (e.g. "homogeneity", "disparity"), therefore the scores computed during
+    a run can be read back by the next runs instead of being computed again.
+    The sequences encoded with SequencesEncoder are hashed by action names and the
+    other sequences by their items (see content_hash), therefore the encoded and
+    the raw sequences do not share their scores.
+    """
+    # Holds the number of pairs read by each query of get_many
+    CHUNK_SIZE = 400
+
+    def __init__(self, path: str = ":memory:", commit_every: int = 1000, read_only: bool = False):
+        """
+        Parameters
+        ----------
+        path : str, optional
+            The path of the SQLite file. The default is ":memory:" (not persistent).
+
+        commit_every : int, optional
+            The number of scores written before the changes are committed.
+            The default is 1000.
+
+        read_only : bool, optional
+            When True, the scores set are ignored. This is used by the processes of
+            SequencesClustersEvaluation.evaluate_model so that only the main
+            process writes to the file. The default is False.
+        """
+        if isinstance(path, str) is False:
+            raise TypeError("path should be of type str.")
+        # end if
+        self.path = path
+        self.commit_every = commit_every
+        self.read_only = read_only
+        self.hits, self.misses, self.writes = 0, 0, 0
+        self._pending = 0
+        self._connection = None
+        self._open()
+    # end __init__
+
+    def _open(self):
+        """ Open the connection and create the table if needed. """
+        self._connection = sqlite3.connect(self.path)
+        # The commits do not wait for the file to be synced, the processes can read while a process writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores (sequence1 TEXT NOT NULL, sequence2 TEXT NOT NULL, "
+            "variant TEXT NOT NULL, score INTEGER NOT NULL, PRIMARY KEY (sequence1, sequence2, variant)) WITHOUT ROWID")
+        self._connection.commit()
+    # end _open
+
+    def __enter__(self):
+        return self
+    # end __enter__
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    # end __exit__
+
+    def __getstate__(self):
+        """ Only the settings are pickled, the connection is opened again when unpickled. """
+        self.flush()
+        return {"path": self.path, "commit_every": self.commit_every, "read_only": self.read_only}
+    # end __getstate__
+
+    def __setstate__(self, state: dict):
+        self.__init__(path=state["path"], commit_every=state["commit_every"],
+                      read_only=state.get("read_only", False))
+    # end __setstate__
+
+    @staticmethod
+    def content_hash(sequence: list, symbols: list = None) -> str:
+        """
+        Return the hash of the content of the sequence.
+        The int of the sequences encoded with SequencesEncoder depend on the run,
+        the symbols (SequencesEncoder.symbols) are used to hash the action names instead.
+        The raw sequences are hashed by their items and not by action names, since
+        their scores can differ from the scores of the encoded sequences (e.g.
+        ['scan', 0] and ['scan'] are the same action but are different items).
+        """
+        if symbols is not None:
+            sequence = [symbols[item] for item in sequence]
+        # end if
+        content = json.dumps(sequence, separators=(",", ":"), default=str)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+    # end content_hash
+
+    def get(self, hash1: str, hash2: str, variant: str):
+        """
+        Return the score of the pair of sequences for the variant.
+
+        Returns
+        -------
+        int or None if the score is not stored.
+        """
+        row = self._connection.execute(
+            "SELECT score FROM scores WHERE sequence1 = ? AND sequence2 = ? AND variant = ?",
+            (hash1, hash2, variant)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        # end if
+        self.hits += 1
+        return row[0]
+    # end get
+
+    def get_many(self, pairs: list, variant: str) -> list:
+        """
+        Return the scores of the pairs of sequences for the variant,
+        the pairs are read with one query for each CHUNK_SIZE pairs.
+
+        Parameters
+        ----------
+        pairs : list
+            The pairs of hashes [(hash1, hash2)].
+
+        Returns
+        -------
+        list of the score (int) of each pair or None if the score is not stored.
+        """
+        found = dict()
+        for start in range(0, len(pairs), SequencesScoreCache.CHUNK_SIZE):
+            chunk = pairs[start:start + SequencesScoreCache.CHUNK_SIZE]
+            rows = self._connection.execute(
+                "WITH pairs(sequence1, sequence2) AS (VALUES " + ", ".join(["(?, ?)"] * len(chunk)) + ") "
+                "SELECT scores.sequence1, scores.sequence2, score FROM pairs CROSS JOIN scores "
+                "ON scores.sequence1 = pairs.sequence1 AND scores.sequence2 = pairs.sequence2 AND variant = ?",
+                [value for pair in chunk for value in pair] + [variant]).fetchall()
+            for hash1, hash2, score in rows:
+                found[(hash1, hash2)] = score
+            # end for
+        # end for
+        scores = [found.get(tuple(pair), None) for pair in pairs]
+        hits = sum([1 for score in scores if score is not None])
+        self.hits += hits
+        self.misses += len(scores) - hits
+        return scores
+    # end get_many
+
+    def set(self, hash1: str, hash2: str, variant: str, score: int):
+        """ Store the score of the pair of sequences for the variant. """
+        if self.read_only is True:
+            return
+        # end if
+        self._connection.execute(
+            "INSERT OR REPLACE INTO scores (sequence1, sequence2, variant, score) VALUES (?, ?, ?, ?)",
+            (hash1, hash2, variant, int(score)))
+        self.writes += 1
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+        # end if
+    # end set
+
+    def set_many(self, rows: list):
+        """ Store the scores of the pairs of sequences [(hash1, hash2, variant, score)]. """
+        if self.read_only is True or not rows:
+            return
+        # end if
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO scores (sequence1, sequence2, variant, score) VALUES (?, ?, ?, ?)",
+            [(hash1, hash2, variant, int(score)) for hash1, hash2, variant, score in rows])
+        self.writes += len(rows)
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self.flush()
+        # end if
+    # end set_many
+
+    def flush(self):
+        """ Commit the scores written. """
+        if self._connection is not None and self._pending:
+            self._connection.commit()
+        # end if
+        self._pending = 0
+    # end flush
+
+    def close(self):
+        """ Commit the scores written and close the connection. """
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+        # end if
+    # end close
+
+    def get_statistics(self) -> dict:
+        """ Return the number of hits, misses and writes. """
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes}
+    # end get_statistics
+
+# end SequencesScoreCache
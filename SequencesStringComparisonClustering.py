@@ -5,6 +5,17 @@ Created on Tue Oct  27 23:40:00 2020
 
 @author: Vahana Dorcis
 """
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from Instrumentation import Instrumentation
+from SequencesEncoder import SequencesEncoder
+try:
+    import numpy
+except ImportError:  # numpy is only used by create_patterns
+    numpy = None
 
 
 class SequencesStringComparisonClustering(object):
@@ -62,6 +73,37 @@ class SequencesStringComparisonClustering(object):
         return True
     # end are_patterns_similar
 
+    @staticmethod
+    def create_pattern_key(pattern: list, consider_order_of_sequence: bool = True):
+        """
+        Create a hashable key from a pattern. Two patterns are similar
+        (see are_patterns_similar) if and only if their keys are equal.
+
+        Parameters
+        ----------
+        pattern : list
+            The pattern (subsequences) returned by create_pattern.
+
+        consider_order_of_sequence : bool, optional
+            When False, the key only holds the number of occurrences
+            of each item, which is the same as comparing the sorted
+            patterns. The default is True.
+
+        Returns
+        -------
+        tuple or frozenset (None if the pattern is empty since an empty
+        pattern is never similar to another pattern.)
+        """
+        if not pattern:
+            return None
+        # end if
+        key = tuple([SequencesEncoder.to_hashable(p) for p in pattern])
+        if consider_order_of_sequence is False:
+            return frozenset(Counter(key).items())
+        # end if
+        return key
+    # end create_pattern_key
+
     @staticmethod
     def _helper_validate_pattern_inputs(
             subsequence_size: int,
@@ -187,29 +229,37 @@ class SequencesStringComparisonClustering(object):
         if consider_order_of_sequence is False:
             sequence_copy = sorted(from_sequence)
         # end if
+        to_hashable = SequencesEncoder.to_hashable
+        # Holds the values already added to the patterns and the subsequences
+        seen_patterns, seen_subsequences = set(), set()
+        # Holds the number of back to back occurrences of the last value added
+        run_count = 0
         # Go through the content of the from_sequence
         for fs_item in sequence_copy:
+            is_repeated = bool(patterns) and fs_item == patterns[-1]
             if consider_immediate_occurrence is False:
                 # Back to back values are not considered, therefore
                 # move on if the current value is the same as the last one.
-                if patterns and fs_item == patterns[-1]:
+                if is_repeated is True:
                     continue
                 # end if
             # end if
-            if consider_duplicate_values is False and fs_item in patterns:
-                if consider_immediate_occurrence is True:
-                    if len(patterns) >= immediate_occurrence_max:
-                        compare_to = [fs_item] * immediate_occurrence_max
-                        if patterns[-immediate_occurrence_max:] == compare_to:
+            if consider_duplicate_values is False:
+                item_key = to_hashable(fs_item)
+                if item_key in seen_patterns:
+                    if consider_immediate_occurrence is True:
+                        if is_repeated is True and run_count >= immediate_occurrence_max:
                             continue
                         # end if
+                    else:
+                        continue
                     # end if
-                else:
-                    continue
                 # end if
+                seen_patterns.add(item_key)
             # end if
             # Add the item
             patterns.append(fs_item)
+            run_count = run_count + 1 if is_repeated is True else 1
 
             if subsequence_size <= 1:
                 subsequences.append(fs_item)
@@ -217,10 +267,13 @@ class SequencesStringComparisonClustering(object):
                 p_size = len(patterns)
                 if p_size == subsequence_size:
                     subsequences.append(patterns[:subsequence_size])
+                    seen_subsequences.add(to_hashable(subsequences[-1]))
                 elif p_size > subsequence_size:
                     subsequence = patterns[-subsequence_size + 1] + [fs_item]
                     # Only keep unique values
-                    if subsequence not in subsequences:
+                    subsequence_key = to_hashable(subsequence)
+                    if subsequence_key not in seen_subsequences:
+                        seen_subsequences.add(subsequence_key)
                         subsequences.append(subsequence)
                     # end if
                 # end if
@@ -229,18 +282,217 @@ class SequencesStringComparisonClustering(object):
         return patterns, subsequences
     # end create_pattern
 
+    @staticmethod
+    @Instrumentation.instrument("create_patterns", items="encoded_batch")
+    def create_patterns(
+            encoded_batch, subsequence_size: int = 1,
+            consider_order_of_sequence: bool = True,
+            consider_immediate_occurrence: bool = True,
+            consider_duplicate_values: bool = True,
+            immediate_occurrence_max: int = 2
+    ) -> list:
+        """
+        Create the patterns of a batch of integer-encoded sequences.
+        When numpy is available, the run-length collapse, the capping of the
+        runs at immediate_occurrence_max and the removal of the duplicates
+        are done on the whole batch at once, otherwise create_pattern is
+        called for each sequence. The results are the same as create_pattern.
+
+        Parameters
+        ----------
+        encoded_batch : SequencesEncoder or list
+            The encoded sequences (lists or arrays of int).
+
+        subsequence_size, consider_order_of_sequence, consider_immediate_occurrence,
+        consider_duplicate_values, immediate_occurrence_max :
+            See create_pattern. When subsequence_size > 1, create_pattern is
+            called for each sequence.
+
+        Raises
+        ------
+        TypeError
+            Raised when one of the input parameters is not the right type
+            or when a sequence is empty.
+
+        Returns
+        -------
+        list [(patterns, subsequences)] (One tuple per sequence.)
+        """
+        if not subsequence_size:
+            subsequence_size = 1
+        # end if
+        _ = SequencesStringComparisonClustering._helper_validate_pattern_inputs(
+                subsequence_size=subsequence_size,
+                consider_order_of_sequence=consider_order_of_sequence,
+                consider_immediate_occurrence=consider_immediate_occurrence,
+                consider_duplicate_values=consider_duplicate_values,
+                immediate_occurrence_max=immediate_occurrence_max
+        )
+        if immediate_occurrence_max < 2:
+            immediate_occurrence_max = 2
+        # end if
+        if numpy is None or subsequence_size > 1:
+            return [
+                SequencesStringComparisonClustering.create_pattern(
+                    from_sequence=list(sequence), subsequence_size=subsequence_size,
+                    consider_order_of_sequence=consider_order_of_sequence,
+                    consider_immediate_occurrence=consider_immediate_occurrence,
+                    consider_duplicate_values=consider_duplicate_values,
+                    immediate_occurrence_max=immediate_occurrence_max)
+                for sequence in encoded_batch]
+        # end if
+        # Holds all the steps of the batch one after the other
+        if isinstance(encoded_batch, SequencesEncoder) is True:
+            buffer, offsets = encoded_batch.get_buffers()
+            values = numpy.frombuffer(buffer, dtype=numpy.int32).astype(numpy.int64)
+            lengths = numpy.diff(numpy.frombuffer(offsets, dtype=numpy.int64))
+        else:
+            lengths = numpy.array([len(sequence) for sequence in encoded_batch], dtype=numpy.int64)
+            values = numpy.fromiter(
+                (step for sequence in encoded_batch for step in sequence), dtype=numpy.int64,
+                count=int(lengths.sum()))
+        # end if
+        batch_size = len(lengths)
+        if batch_size == 0:
+            return list()
+        # end if
+        if lengths.min() == 0:
+            raise TypeError("from_sequence should be a non-empty list.")
+        # end if
+        # Holds the index of the sequence of each step
+        sequence_ids = numpy.repeat(numpy.arange(batch_size), lengths)
+        indexes = numpy.arange(len(values))
+        if consider_order_of_sequence is False:
+            values = values[numpy.lexsort((values, sequence_ids))]
+        # end if
+        # Holds True for the first step of each run of back to back values
+        run_starts = numpy.ones(len(values), dtype=bool)
+        run_starts[1:] = (values[1:] != values[:-1]) | (sequence_ids[1:] != sequence_ids[:-1])
+        if consider_immediate_occurrence is False and consider_duplicate_values is True:
+            keep = run_starts
+        elif consider_immediate_occurrence is True and consider_duplicate_values is False:
+            # Position of each step in its run
+            run_positions = indexes - numpy.maximum.accumulate(numpy.where(run_starts, indexes, 0))
+            keep = run_positions < immediate_occurrence_max
+        elif consider_duplicate_values is False:
+            # Only keep the first occurrence of each value
+            order = numpy.lexsort((indexes, values, sequence_ids))
+            first = numpy.ones(len(values), dtype=bool)
+            first[1:] = ((values[order][1:] != values[order][:-1])
+                         | (sequence_ids[order][1:] != sequence_ids[order][:-1]))
+            keep = numpy.zeros(len(values), dtype=bool)
+            keep[order[first]] = True
+        else:
+            keep = numpy.ones(len(values), dtype=bool)
+        # end if
+        kept_counts = numpy.bincount(sequence_ids[keep], minlength=batch_size)
+        results = list()
+        for patterns in numpy.split(values[keep], numpy.cumsum(kept_counts)[:-1]):
+            patterns = patterns.tolist()
+            results.append((patterns, patterns.copy()))
+        # end for
+        return results
+    # end create_patterns
+
     # %%
     @staticmethod
+    def _create_patterns_chunk(sequences: list, parameters: dict) -> list:
+        """
+        Create the patterns and the pattern keys of the sequences.
+        This is the unit of work sent to the processes by create_clusters.
+
+        Returns
+        -------
+        list [(patterns, subsequences, key)]
+        """
+        results = list()
+        for sequence in sequences:
+            patterns, subsequences = SequencesStringComparisonClustering.create_pattern(
+                from_sequence=sequence, **parameters)
+            key = SequencesStringComparisonClustering.create_pattern_key(
+                pattern=subsequences, consider_order_of_sequence=parameters["consider_order_of_sequence"])
+            results.append((patterns, subsequences, key))
+        # end for
+        return results
+    # end _create_patterns_chunk
+
+    @staticmethod
+    def _create_patterns_in_parallel(sequences: list, parameters: dict, n_jobs: int = -1, executor=None,
+                                     chunk_size: int = None):
+        """
+        Create the patterns of the sequences using a process pool.
+        The results are yielded in the order of the sequences.
+        """
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        # end if
+        if not chunk_size:
+            chunk_size = max(1, -(-len(sequences) // (n_jobs * 4)))
+        # end if
+        chunks = [sequences[i:i + chunk_size] for i in range(0, len(sequences), chunk_size)]
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                chunks_results = list(pool.map(
+                    SequencesStringComparisonClustering._create_patterns_chunk, chunks,
+                    [parameters] * len(chunks)))
+            # end with
+        else:
+            chunks_results = executor.map(
+                SequencesStringComparisonClustering._create_patterns_chunk, chunks,
+                [parameters] * len(chunks))
+        # end if
+        for chunk_results in chunks_results:
+            yield from chunk_results
+        # end for
+    # end _create_patterns_in_parallel
+
+    # %%
+    @staticmethod
+    @Instrumentation.instrument("create_clusters", items="sequences")
     def create_clusters(
             sequences: list, subsequence_size: int = 1,
             consider_order_of_sequence: bool = True,
             consider_immediate_occurrence: bool = True,
             consider_duplicate_values: bool = True,
-            immediate_occurrence_max: int = 2
+            immediate_occurrence_max: int = 2,
+            n_jobs: int = 1, executor=None, chunk_size: int = None
     ) -> tuple:
+        """
+        Create the clusters of the sequences. The sequences with similar
+        patterns (see create_pattern) are in the same cluster.
+
+        Parameters
+        ----------
+        sequences : list
+            The sequences to cluster.
+
+        subsequence_size, consider_order_of_sequence, consider_immediate_occurrence,
+        consider_duplicate_values, immediate_occurrence_max :
+            See create_pattern.
+
+        n_jobs : int, optional
+            The number of processes used to create the patterns. Set to -1
+            to use all the CPUs. The default is 1 (no process is created).
+
+        executor : concurrent.futures.Executor, optional
+            The executor used to create the patterns instead of a new process
+            pool. The executor is not shut down. The default is None.
+
+        chunk_size : int, optional
+            The number of sequences sent to a process at a time. The default
+            is None (the sequences are split in 4 chunks per process).
+
+        Returns
+        -------
+        tuple (cluster_columns, cluster_values, cluster_size, dict_patterns)
+            The cluster numbers do not depend on n_jobs.
+        """
         if not subsequence_size:
             subsequence_size = 1
         # end if
+        if isinstance(n_jobs, int) is False or n_jobs == 0:
+            raise TypeError("n_jobs should be a non-zero int.")
+        # end if
         _ = SequencesStringComparisonClustering._helper_validate_pattern_inputs(
                 subsequence_size=subsequence_size,
                 consider_order_of_sequence=consider_order_of_sequence,
@@ -253,45 +505,54 @@ class SequencesStringComparisonClustering(object):
         # end if
         # Holds the extracted subsequences
         dict_patterns = dict()
+        # Holds the cluster number of each pattern key
+        dict_keys = dict()
         # Holds the clustering result
         column_sequence = "Sequences"
         column_sequence_pattern = "Sequences Pattern"
         column_cluster_number = "Cluster Number"
         cluster_columns = [column_sequence, column_sequence_pattern, column_cluster_number]
         cluster_values = list()
-        for sequence in sequences:
-            # Create a pattern
-            pattern_result = SequencesStringComparisonClustering.create_pattern(
-                from_sequence=sequence, subsequence_size=subsequence_size,
-                consider_order_of_sequence=consider_order_of_sequence,
-                consider_immediate_occurrence=consider_immediate_occurrence,
-                consider_duplicate_values=consider_duplicate_values,
-                immediate_occurrence_max=immediate_occurrence_max
-            )
-            patterns, subsequences = pattern_result
-            # Holds the cluster number
-            cluster_number = 0
-            if not dict_patterns:
-                dict_patterns = {cluster_number: (subsequences, [sequence])}
-            else:
-                has_pattern = False
-                for number, values in dict_patterns.items():
-                    if SequencesStringComparisonClustering.are_patterns_similar(
-                        pattern1=subsequences, pattern2=values[0],
-                        consider_order_of_sequence=consider_order_of_sequence
-                    ) is True:
-                        has_pattern = True
-                        cluster_number = number
-                        # Update the dictionary
-                        new_values = (subsequences, values[1] + [sequence])
-                        dict_patterns[cluster_number] = new_values
-                        break
-                    # end if
-                # end for
-                if has_pattern is False:
-                    cluster_number = len(dict_patterns)
-                    dict_patterns[cluster_number] = (subsequences, [sequence])
+        parameters = {
+            "subsequence_size": subsequence_size,
+            "consider_order_of_sequence": consider_order_of_sequence,
+            "consider_immediate_occurrence": consider_immediate_occurrence,
+            "consider_duplicate_values": consider_duplicate_values,
+            "immediate_occurrence_max": immediate_occurrence_max
+        }
+        if executor is not None or n_jobs != 1:
+            sequences = sequences if isinstance(sequences, list) is True else list(sequences)
+            pattern_results = zip(sequences, SequencesStringComparisonClustering._create_patterns_in_parallel(
+                sequences=sequences, parameters=parameters, n_jobs=n_jobs, executor=executor,
+                chunk_size=chunk_size))
+        else:
+            pattern_results = (
+                (sequence, SequencesStringComparisonClustering._create_patterns_chunk([sequence], parameters)[0])
+                for sequence in sequences)
+        # end if
+        # Holds True when the time of the patterns and of the lookups is recorded
+        is_instrumented = Instrumentation.enabled
+        lookup_seconds, pattern_seconds, start = 0.0, 0.0, time.perf_counter()
+        for sequence, pattern_result in pattern_results:
+            if is_instrumented is True:
+                # The patterns are created while iterating over pattern_results
+                pattern_seconds += time.perf_counter() - start
+                start = time.perf_counter()
+            # end if
+            patterns, subsequences, key = pattern_result
+            # Look for the cluster of the pattern
+            cluster_number = dict_keys.get(key, None) if key is not None else None
+            if cluster_number is None:
+                cluster_number = len(dict_patterns)
+                dict_patterns[cluster_number] = (subsequences, [sequence])
+                if key is not None:
+                    dict_keys[key] = cluster_number
                 # end if
+            else:
+                # Update the dictionary
+                members = dict_patterns[cluster_number][1]
+                members.append(sequence)
+                dict_patterns[cluster_number] = (subsequences, members)
             # end if
             # Store the clustering result
             cluster_row = [None] * len(cluster_columns)
@@ -299,7 +560,15 @@ class SequencesStringComparisonClustering(object):
             cluster_row[cluster_columns.index(column_sequence_pattern)] = patterns
             cluster_row[cluster_columns.index(column_sequence)] = sequence
             cluster_values.append(cluster_row)
+            if is_instrumented is True:
+                lookup_seconds += time.perf_counter() - start
+                start = time.perf_counter()
+            # end if
         # end for sequences
+        if is_instrumented is True:
+            Instrumentation.record("create_clusters.create_pattern", pattern_seconds, items=len(cluster_values))
+            Instrumentation.record("create_clusters.cluster_lookup", lookup_seconds, items=len(cluster_values))
+        # end if
         cluster_size = len(dict_patterns)
         return cluster_columns, cluster_values, cluster_size, dict_patterns
     # end create_clusters
@@ -325,4 +594,47 @@ class SequencesStringComparisonClustering(object):
                     dict_result[parameter] = res
         return dict_result
     # end example_create_pattern
+
+    @staticmethod
+    def example_create_pattern_benchmark(sequence_size: int = 10000, alphabet_size: int = 500, seed: int = 0):
+        """
+        Compare the time taken by create_pattern to the time taken by the
+        previous implementation, which searched the values in the patterns
+        list (quadratic), on a long sequence. Both outputs must be identical.
+
+        Returns
+        -------
+        dict {"sequence_size": int, "previous": float (seconds), "current": float (seconds), "speedup": float}
+        """
+        def create_pattern_previous(from_sequence: list, immediate_occurrence_max: int = 2) -> list:
+            # consider_order_of_sequence=True, consider_immediate_occurrence=True,
+            # consider_duplicate_values=False
+            patterns = list()
+            for fs_item in from_sequence:
+                if fs_item in patterns:
+                    if len(patterns) >= immediate_occurrence_max:
+                        compare_to = [fs_item] * immediate_occurrence_max
+                        if patterns[-immediate_occurrence_max:] == compare_to:
+                            continue
+                        # end if
+                    # end if
+                # end if
+                patterns.append(fs_item)
+            # end for
+            return patterns
+        # end create_pattern_previous
+
+        generator = random.Random(seed)
+        sequence = [[f"action{generator.randrange(alphabet_size)}", 0] for _ in range(sequence_size)]
+        start = time.perf_counter()
+        previous = create_pattern_previous(sequence)
+        time_previous = time.perf_counter() - start
+        start = time.perf_counter()
+        current, _ = SequencesStringComparisonClustering.create_pattern(
+            from_sequence=sequence, subsequence_size=1, consider_duplicate_values=False)
+        time_current = time.perf_counter() - start
+        assert current == previous, "create_pattern did not return the same patterns."
+        return {"sequence_size": sequence_size, "previous": time_previous, "current": time_current,
+                "speedup": time_previous / time_current if time_current else float("inf")}
+    # end example_create_pattern_benchmark
 # end SequencesStringComparisonClustering